@@ -20,14 +20,60 @@ Examples:
 import os
 import sys
 import argparse
+import functools
 import subprocess
 import json
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
-from typing import Dict, Optional, List
+from typing import Dict, FrozenSet, Optional, List
 
 # Import utility functions
-from run_command import run_command_and_get_return_info
-from git_sync_util import deep_merge
+from run_command import run_command_and_get_return_info, run_command_and_iter_lines
+# With pygit2 installed, local refs are read in-process (see git_sync_util)
+from git_sync_util import deep_merge, open_pygit2_repository
+
+# File (inside the git directory) used to cache branch hashes between runs
+BRANCH_CACHE_FILE_NAME = "fried_branch_cache.json"
+# Seconds a cached result stays valid. Off by default: a push from another clone
+# changes the remote without touching any local ref, so a cached result can hide it
+BRANCH_CACHE_TTL_SECONDS = 0
+
+# Separator line of the comparison reports
+_SEP = "=" * 80
+
+# Environment for git subprocesses (all commands here are read-only):
+# - GIT_OPTIONAL_LOCKS=0: don't take optional locks (e.g. the index refresh lock)
+# - GIT_TERMINAL_PROMPT=0: fail instead of hanging on a credential prompt
+# System config is still read, it may hold credential helpers and TLS settings.
+_GIT_ENV = {**os.environ, "GIT_OPTIONAL_LOCKS": "0", "GIT_TERMINAL_PROMPT": "0"}
+
+# Guards the cache file when several remotes are queried concurrently
+_branch_cache_lock = threading.Lock()
+
+# Environment variable to cap the number of concurrent git subprocesses.
+# Keeps large repositories from exhausting file descriptors.
+GIT_COMMAND_CONCURRENCY_ENV = "GIT_COMMAND_CONCURRENCY"
+
+
+def get_git_command_concurrency() -> int:
+    """Get the maximum number of git subprocesses to run concurrently.
+
+    Reads GIT_COMMAND_CONCURRENCY from the environment, defaulting to
+    four workers per CPU.
+    """
+    default = (os.cpu_count() or 1) * 4
+    value = os.environ.get(GIT_COMMAND_CONCURRENCY_ENV, "")
+    try:
+        concurrency = int(value) if value.strip() else default
+    except ValueError:
+        print(
+            f"Warning: Invalid {GIT_COMMAND_CONCURRENCY_ENV}='{value}', using {default}"
+        )
+        concurrency = default
+    return max(1, concurrency)
 
 
 @dataclass
@@ -61,15 +107,11 @@ class ComparisonResult:
     unchanged: Dict[str, str]
 
     def to_dict(self) -> Dict:
-        """Convert to dictionary for JSON serialization."""
-        return {
-            "changed": {
-                branch: {"local": comp.local, "remote": comp.remote}
-                for branch, comp in self.changed.items()
-            },
-            "no_remote": self.no_remote,
-            "unchanged": self.unchanged,
-        }
+        """Convert to dictionary for JSON serialization.
+
+        asdict converts the nested comparison dataclasses in a single recursive pass.
+        """
+        return asdict(self)
 
 
 @dataclass
@@ -89,107 +131,321 @@ class RemoteToRemoteComparisonResult:
     unchanged: Dict[str, str]
 
     def to_dict(self) -> Dict:
-        """Convert to dictionary for JSON serialization."""
-        return {
-            "changed": {
-                branch: {"remote1": comp.remote1, "remote2": comp.remote2}
-                for branch, comp in self.changed.items()
-            },
-            "no_remote1": self.no_remote1,
-            "no_remote2": self.no_remote2,
-            "unchanged": self.unchanged,
-        }
+        """Convert to dictionary for JSON serialization.
+
+        asdict converts the nested comparison dataclasses in a single recursive pass.
+        """
+        return asdict(self)
 
 
-def get_local_branches(workspace_dir: str, remote_name: str) -> List[str]:
-    """Get all remote branch names for a given remote.
+@functools.lru_cache(maxsize=None)
+def get_remote_names(workspace_dir: str) -> FrozenSet[str]:
+    """Get the names of all remotes configured in the repository.
+
+    The result is memoized, so validating several remotes costs a single `git remote`.
+
+    Args:
+        workspace_dir: Path to the git repository
+
+    Returns:
+        Set of remote names (empty if they could not be listed)
+    """
+    try:
+        cmd = ["git", "remote"]
+        output = run_command_and_get_return_info(
+            cmd, cwd=workspace_dir, shell=False, env=_GIT_ENV
+        )
+        return frozenset(output.split())
+    except subprocess.CalledProcessError:
+        return frozenset()
+
+
+def validate_remote_exists(
+    remote_name: str, remotes: FrozenSet[str], label: str = "Remote"
+) -> None:
+    """Exit with the list of available remotes if a remote is not configured.
+
+    Args:
+        remote_name: Name of the remote to validate
+        remotes: Names of the configured remotes (see get_remote_names)
+        label: How the remote is referred to in the error message
+    """
+    if remote_name in remotes:
+        return
+    print(f"Error: {label} '{remote_name}' not found")
+    print("Available remotes:")
+    for name in sorted(remotes):
+        print(f"  - {name}")
+    sys.exit(1)
+
+
+def _get_pygit2_ref_commit(repo, ref_name: str) -> Optional[str]:
+    """Get the commit hash a ref points to with pygit2, or None if it doesn't exist."""
+    ref = repo.references.get(ref_name)
+    if ref is None:
+        return None
+    return str(ref.resolve().target)
+
+
+def _get_local_branches_pygit2(
+    repo, remote_name: str, limit_branches: Optional[FrozenSet[str]]
+) -> Dict[str, str]:
+    """pygit2 implementation of get_local_branches."""
+    prefix = f"refs/remotes/{remote_name}/"
+    branches: Dict[str, str] = {}
+    if limit_branches:
+        # Look up only the requested refs
+        for branch_name in sorted(limit_branches):
+            commit_hash = _get_pygit2_ref_commit(repo, prefix + branch_name)
+            if commit_hash:
+                branches[branch_name] = commit_hash
+        return branches
+
+    for ref_name in repo.references:
+        if not ref_name.startswith(prefix):
+            continue
+        target = repo.references[ref_name].target
+        # Skip symbolic refs like "origin/HEAD" (their target is a ref name)
+        if isinstance(target, str):
+            continue
+        branches[ref_name[len(prefix) :]] = str(target)
+    return dict(sorted(branches.items()))
+
+
+@functools.lru_cache(maxsize=None)
+def get_local_branches(
+    workspace_dir: str,
+    remote_name: str,
+    limit_branches: Optional[FrozenSet[str]] = None,
+) -> Dict[str, str]:
+    """Get all local tracking branches and their commit hashes for a given remote.
+
+    The result is memoized per arguments for the duration of the run; callers
+    must not modify the returned dictionary.
 
     Args:
         workspace_dir: Path to the git repository
         remote_name: Name of the remote (e.g. 'origin')
+        limit_branches: Optional set of branch names, only these refs are asked from git
 
     Returns:
-        List of local branch names
+        Dictionary mapping branch names to local commit hashes, in refname order
     """
-    branches: List[str] = []
+    repo = open_pygit2_repository(workspace_dir)
+    if repo is not None:
+        return _get_local_branches_pygit2(repo, remote_name, limit_branches)
+
+    branches: Dict[str, str] = {}
     try:
-        # Use -r to list remote branches, then filter by the given remote
-        cmd = ["git", "branch", "-r"]
-        output = run_command_and_get_return_info(cmd, cwd=workspace_dir, shell=False)
+        # for-each-ref lists name and hash of every ref under the remote in one pass
+        # strip=3 turns "refs/remotes/origin/feature/x" into "feature/x"
+        cmd = [
+            "git",
+            "for-each-ref",
+            "--format=%(refname:strip=3) %(objectname)",
+        ]
+        if limit_branches:
+            # Let git look up only the requested refs
+            cmd += [f"refs/remotes/{remote_name}/{b}" for b in sorted(limit_branches)]
+        else:
+            cmd.append(f"refs/remotes/{remote_name}/")
 
         # Typical lines:
-        #   origin/HEAD -> origin/main
-        #   origin/main
-        #   origin/develop
-        for line in output.strip().splitlines():
-            line = line.strip()
-            if not line:
+        #   HEAD 1a2b3c...
+        #   develop 4d5e6f...
+        #   main 1a2b3c...
+        # Lines are parsed while git is still writing them
+        for line in run_command_and_iter_lines(cmd, cwd=workspace_dir, env=_GIT_ENV):
+            parts = line.rsplit(" ", 1)
+            if len(parts) != 2:
                 continue
-            # Skip symbolic refs like "origin/HEAD -> origin/main"
-            if "->" in line:
+            branch_name, commit_hash = parts[0].strip(), parts[1].strip()
+            # Skip the symbolic ref "origin/HEAD"
+            if not branch_name or branch_name == "HEAD":
                 continue
-            # Only keep branches that belong to the specified remote
-            if line.startswith(f"{remote_name}/"):
-                branch_name = line[len(remote_name) + 1 :].strip()
-                if branch_name:
-                    branches.append(branch_name)
+            # A pattern also matches refs below it ("master" matches "master/x")
+            if limit_branches and branch_name not in limit_branches:
+                continue
+            branches[branch_name] = commit_hash
     except subprocess.CalledProcessError:
-        pass
+        # Don't return a partial listing
+        branches = {}
 
-    return sorted(branches)
+    # for-each-ref already sorts by refname
+    return branches
 
 
-def get_local_branch_commit(
-    workspace_dir: str, remote_name: str, branch_name: str
-) -> Optional[str]:
-    """Get the commit hash for a local branch.
-
-    Args:
-        workspace_dir: Path to the git repository
-        branch_name: Name of the local branch
+def _get_git_dir(workspace_dir: str) -> Optional[str]:
+    """Get the git directory of a workspace (".git" or the bare repository itself).
 
     Returns:
-        Commit hash or None if branch doesn't exist
+        Path to the git directory, or None if it cannot be located without git
     """
+    dot_git = os.path.join(workspace_dir, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    if os.path.isfile(os.path.join(workspace_dir, "HEAD")):
+        return workspace_dir  # Bare repository
+    return None
+
+
+def _get_branch_cache_key(
+    git_dir: str, remote_name: str, limit_branches: Optional[FrozenSet[str]]
+) -> str:
+    """Build the cache key from the remote, the branch filter and local ref mtimes.
+
+    Any fetch touching packed-refs, the reftable stack or a directory below the
+    remote's refs changes the key. A loose ref is replaced by renaming a lock file
+    in its own directory, so "origin/feature/x" only changes the mtime of
+    "refs/remotes/origin/feature", every directory of the tree is part of the key.
+    """
+    paths = [os.path.join(git_dir, "packed-refs"), os.path.join(git_dir, "reftable")]
+    remote_refs_dir = os.path.join(git_dir, "refs", "remotes", remote_name)
+    for root, dirs, _files in os.walk(remote_refs_dir):
+        dirs.sort()
+        paths.append(root)
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(str(os.stat(path).st_mtime_ns))
+        except OSError:
+            mtimes.append("-")
+    limit = ";".join(sorted(limit_branches)) if limit_branches else ""
+    return "|".join([remote_name, limit] + mtimes)
+
+
+def _load_branch_cache(git_dir: str) -> Dict:
+    """Load the branch hash cache file, returning an empty dict if unusable."""
+    cache_file = os.path.join(git_dir, BRANCH_CACHE_FILE_NAME)
     try:
-        cmd = ["git", "rev-parse", f"{remote_name}/{branch_name}"]
-        output = run_command_and_get_return_info(cmd, cwd=workspace_dir, shell=False)
-        return output.strip()
-    except subprocess.CalledProcessError:
-        return None
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_branch_cache(git_dir: str, cache: Dict) -> None:
+    """Write the branch hash cache file atomically (write temp file, then replace)."""
+    cache_file = os.path.join(git_dir, BRANCH_CACHE_FILE_NAME)
+    try:
+        fd, temp_path = tempfile.mkstemp(
+            prefix=BRANCH_CACHE_FILE_NAME, suffix=".tmp", dir=git_dir
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(temp_path, cache_file)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    except OSError as e:
+        print(f"Warning: Failed to write branch cache '{cache_file}': {e}")
 
 
-def get_remote_branch_commit(
-    workspace_dir: str, remote_name: str, branch_name: str
-) -> Optional[str]:
-    """Get the commit hash for a branch on a remote using ls-remote.
+def get_all_remote_heads(
+    workspace_dir: str,
+    remote_name: str,
+    cache_ttl: int = 0,
+    limit_branches: Optional[FrozenSet[str]] = None,
+) -> Dict[str, str]:
+    """Get the commit hashes of all branches on a remote with a single ls-remote.
+
+    With a positive cache_ttl, the result is cached in the git directory and
+    reused while the local refs of the remote are unchanged and the cached
+    result is younger than cache_ttl.
 
     Args:
         workspace_dir: Path to the git repository
         remote_name: Name of the remote
-        branch_name: Name of the branch
+        cache_ttl: Seconds a cached result stays valid, 0 disables the cache
+        limit_branches: Optional set of branch names, only these refs are asked from
+            the remote
 
     Returns:
-        Commit hash or None if branch doesn't exist on remote
+        Dictionary mapping branch names to commit hashes on the remote
     """
+    git_dir = _get_git_dir(workspace_dir) if cache_ttl > 0 else None
+    cache_key = None
+    if git_dir:
+        cache_key = _get_branch_cache_key(git_dir, remote_name, limit_branches)
+        entry = _load_branch_cache(git_dir).get(remote_name)
+        if isinstance(entry, dict) and entry.get("key") == cache_key:
+            age = time.time() - entry.get("time", 0)
+            if 0 <= age < cache_ttl:
+                message = f"Using cached branch hashes for remote '{remote_name}'"
+                print(f"{message} ({int(age)}s old)\n", end="")
+                return entry["heads"]
+
+    heads: Dict[str, str] = {}
     try:
-        ref = f"refs/heads/{branch_name}"
-        cmd = ["git", "ls-remote", remote_name, ref]
-        output = run_command_and_get_return_info(cmd, cwd=workspace_dir, shell=False)
-
-        # Parse output: "abc123...    refs/heads/branch_name"
-        for line in output.strip().splitlines():
-            parts = line.split()
-            if len(parts) >= 2 and parts[1] == ref:
-                return parts[0]
+        cmd = ["git", "ls-remote", "--heads", remote_name]
+        if limit_branches:
+            # Let the remote send only the requested refs
+            cmd += [f"refs/heads/{b}" for b in sorted(limit_branches)]
+
+        # Parse output: "abc123...\trefs/heads/branch_name"
+        # Lines are parsed while git is still writing them
+        prefix = "refs/heads/"
+        for line in run_command_and_iter_lines(cmd, cwd=workspace_dir, env=_GIT_ENV):
+            parts = line.split("\t")
+            if len(parts) >= 2 and parts[1].startswith(prefix):
+                branch_name = parts[1][len(prefix) :].strip()
+                # Patterns match the ref name tail, keep exact names only
+                if limit_branches and branch_name not in limit_branches:
+                    continue
+                if branch_name:
+                    heads[branch_name] = parts[0].strip()
     except subprocess.CalledProcessError:
-        pass
+        # Don't return (or cache) a partial listing
+        return {}
 
-    return None
+    if git_dir:
+        # Remotes may be looked up concurrently, serialize read-modify-write of the file
+        with _branch_cache_lock:
+            cache = _load_branch_cache(git_dir)
+            cache[remote_name] = {"key": cache_key, "time": time.time(), "heads": heads}
+            _save_branch_cache(git_dir, cache)
+
+    return heads
+
+
+def get_all_heads_by_remote(
+    workspace_dir: str,
+    remote_names: List[str],
+    cache_ttl: int = 0,
+    limit_branches: Optional[FrozenSet[str]] = None,
+) -> Dict[str, Dict[str, str]]:
+    """Get the branch heads of several remotes, one ls-remote per remote.
+
+    The remotes are queried concurrently, the result can be shared by all passes.
+
+    Args:
+        workspace_dir: Path to the git repository
+        remote_names: Names of the remotes (duplicates are queried once)
+        cache_ttl: Seconds a cached result stays valid, 0 disables the cache
+        limit_branches: Optional set of branch names to limit the lookup to
+
+    Returns:
+        Dictionary mapping remote names to {branch: hash}
+    """
+    unique_remotes = list(dict.fromkeys(remote_names))
+    max_workers = max(1, min(len(unique_remotes), get_git_command_concurrency()))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        heads = executor.map(
+            lambda name: get_all_remote_heads(
+                workspace_dir, name, cache_ttl, limit_branches
+            ),
+            unique_remotes,
+        )
+        return dict(zip(unique_remotes, heads))
 
 
 def get_all_branch_hashes(
-    workspace_dir: str, remote_name: str, limit_branches: Optional[set] = None
+    workspace_dir: str,
+    remote_name: str,
+    limit_branches: Optional[FrozenSet[str]] = None,
+    remote_heads: Optional[Dict[str, str]] = None,
 ) -> Dict[str, Dict[str, Optional[str]]]:
     """Get commit hashes for all local branches (local and remote).
 
@@ -197,26 +453,27 @@ def get_all_branch_hashes(
         workspace_dir: Path to the git repository
         remote_name: Name of the remote
         limit_branches: Optional set of branch names to limit checking to
+        remote_heads: Optional prebuilt {branch: hash} of the remote, to avoid
+            another ls-remote (see get_all_heads_by_remote)
 
     Returns:
         Dictionary mapping branch names to {'local': hash, 'remote': hash}
     """
-    # Use remote branches for the specified remote
-    local_branches = get_local_branches(workspace_dir, remote_name)
-    
-    # Filter branches if limit_branches is specified
-    if limit_branches:
-        local_branches = [b for b in local_branches if b in limit_branches]
-    
-    branch_hashes = {}
-
-    for branch_name in local_branches:
-        local_hash = get_local_branch_commit(workspace_dir, remote_name, branch_name)
-        remote_hash = get_remote_branch_commit(workspace_dir, remote_name, branch_name)
+    # Use remote branches for the specified remote, their hashes come along
+    # (filtered by git itself if limit_branches is specified)
+    local_branches = get_local_branches(workspace_dir, remote_name, limit_branches)
+
+    # Fetch all remote heads in one round-trip instead of one ls-remote per branch
+    if remote_heads is None:
+        remote_heads = get_all_remote_heads(
+            workspace_dir, remote_name, limit_branches=limit_branches
+        )
 
+    branch_hashes = {}
+    for branch_name, local_hash in local_branches.items():
         branch_hashes[branch_name] = {
             "local": local_hash,
-            "remote": remote_hash,
+            "remote": remote_heads.get(branch_name),
         }
 
     return branch_hashes
@@ -226,7 +483,8 @@ def get_all_branch_hashes_two_remotes(
     workspace_dir: str,
     remote1_name: str,
     remote2_name: str,
-    limit_branches: Optional[set] = None,
+    limit_branches: Optional[FrozenSet[str]] = None,
+    heads_by_remote: Optional[Dict[str, Dict[str, str]]] = None,
 ) -> Dict[str, Dict[str, Optional[str]]]:
     """Get commit hashes for all branches comparing two remotes.
 
@@ -235,31 +493,33 @@ def get_all_branch_hashes_two_remotes(
         remote1_name: Name of the first remote
         remote2_name: Name of the second remote
         limit_branches: Optional set of branch names to limit checking to
+        heads_by_remote: Optional prebuilt {remote: {branch: hash}} containing both
+            remotes, to avoid another ls-remote (see get_all_heads_by_remote)
 
     Returns:
         Dictionary mapping branch names to {'remote1': hash, 'remote2': hash}
     """
-    # Get all branches from both remotes
-    remote1_branches = get_local_branches(workspace_dir, remote1_name)
-    remote2_branches = get_local_branches(workspace_dir, remote2_name)
-    all_branches = sorted(set(remote1_branches + remote2_branches))
-    
-    # Filter branches if limit_branches is specified
-    if limit_branches:
-        all_branches = [b for b in all_branches if b in limit_branches]
-    
-    branch_hashes = {}
-
-    for branch_name in all_branches:
-        remote1_hash = get_remote_branch_commit(workspace_dir, remote1_name, branch_name)
-        remote2_hash = get_remote_branch_commit(workspace_dir, remote2_name, branch_name)
-
-        branch_hashes[branch_name] = {
-            "remote1": remote1_hash,
-            "remote2": remote2_hash,
+    # Fetch all heads of both remotes (one ls-remote each, run concurrently)
+    if heads_by_remote is None:
+        heads_by_remote = get_all_heads_by_remote(
+            workspace_dir,
+            [remote1_name, remote2_name],
+            limit_branches=limit_branches,
+        )
+    remote1_hashes = heads_by_remote[remote1_name]
+    remote2_hashes = heads_by_remote[remote2_name]
+
+    # Get all branches from both remotes, in name order
+    # The limit_branches filter is applied in the same pass
+    # (prebuilt heads may be unfiltered)
+    return {
+        branch_name: {
+            "remote1": remote1_hashes.get(branch_name),
+            "remote2": remote2_hashes.get(branch_name),
         }
-
-    return branch_hashes
+        for branch_name in sorted(remote1_hashes.keys() | remote2_hashes.keys())
+        if not limit_branches or branch_name in limit_branches
+    }
 
 
 def compare_branches(
@@ -325,12 +585,10 @@ def compare_two_remotes(
             continue
         elif remote1_hash is None:
             # Branch only exists on remote2
-            if remote2_hash is not None:
-                no_remote1[branch_name] = remote2_hash
+            no_remote1[branch_name] = remote2_hash
         elif remote2_hash is None:
             # Branch only exists on remote1
-            if remote1_hash is not None:
-                no_remote2[branch_name] = remote1_hash
+            no_remote2[branch_name] = remote1_hash
         elif remote1_hash != remote2_hash:
             # Remotes are different - branch has changed
             changed[branch_name] = RemoteBranchComparison(
@@ -357,44 +615,49 @@ def set_teamcity_parameter(name: str, value: str) -> None:
 def print_comparison_result(result: ComparisonResult, remote_name: str):
     """Print the comparison results.
 
+    The report is assembled first and written with a single write call.
+
     Args:
         result: ComparisonResult object
         remote_name: Name of the remote
     """
     has_changes = False
+    lines: List[str] = []
 
     if result.changed:
         has_changes = True
-        print("\n" + "=" * 80)
-        print(f"WARNING: BRANCHES CHANGED on remote '{remote_name}':")
-        print("=" * 80)
+        lines.append("\n" + _SEP)
+        lines.append(f"WARNING: BRANCHES CHANGED on remote '{remote_name}':")
+        lines.append(_SEP)
         for branch_name, comp in result.changed.items():
-            print(f"\n  Branch: {branch_name}")
-            print(f"    Local commit:  {comp.local}")
-            print(f"    Remote commit: {comp.remote}")
+            lines.append(f"\n  Branch: {branch_name}")
+            lines.append(f"    Local commit:  {comp.local}")
+            lines.append(f"    Remote commit: {comp.remote}")
 
     if result.no_remote:
-        print("\n" + "=" * 80)
-        print(f"INFO: BRANCHES NOT ON REMOTE '{remote_name}':")
-        print("=" * 80)
+        lines.append("\n" + _SEP)
+        lines.append(f"INFO: BRANCHES NOT ON REMOTE '{remote_name}':")
+        lines.append(_SEP)
         for branch_name, local_hash in result.no_remote.items():
-            print(f"  {branch_name}: {local_hash[:12]}... (local only)")
+            lines.append(f"  {branch_name}: {local_hash[:12]}... (local only)")
 
     if not has_changes:
-        print("\n" + "=" * 80)
-        print(f"OK: NO CHANGES DETECTED on remote '{remote_name}'")
-        print("=" * 80)
+        lines.append("\n" + _SEP)
+        lines.append(f"OK: NO CHANGES DETECTED on remote '{remote_name}'")
+        lines.append(_SEP)
         if result.unchanged:
-            print("\nBranches (local matches remote):")
+            lines.append("\nBranches (local matches remote):")
             for branch_name, commit_hash in result.unchanged.items():
-                print(f"  {branch_name}: {commit_hash[:12]}...")
+                lines.append(f"  {branch_name}: {commit_hash[:12]}...")
     else:
         if result.unchanged:
-            print("\n" + "=" * 80)
-            print(f"OK: UNCHANGED BRANCHES on remote '{remote_name}':")
-            print("=" * 80)
+            lines.append("\n" + _SEP)
+            lines.append(f"OK: UNCHANGED BRANCHES on remote '{remote_name}':")
+            lines.append(_SEP)
             for branch_name, commit_hash in result.unchanged.items():
-                print(f"  {branch_name}: {commit_hash[:12]}...")
+                lines.append(f"  {branch_name}: {commit_hash[:12]}...")
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def print_remote_comparison_result(
@@ -402,52 +665,65 @@ def print_remote_comparison_result(
 ):
     """Print the comparison results between two remotes.
 
+    The report is assembled first and written with a single write call.
+
     Args:
         result: RemoteToRemoteComparisonResult object
         remote1_name: Name of the first remote
         remote2_name: Name of the second remote
     """
     has_changes = False
+    lines: List[str] = []
 
     if result.changed:
         has_changes = True
-        print("\n" + "=" * 80)
-        print(f"WARNING: BRANCHES DIFFER between '{remote1_name}' and '{remote2_name}':")
-        print("=" * 80)
+        lines.append("\n" + _SEP)
+        lines.append(
+            f"WARNING: BRANCHES DIFFER between '{remote1_name}' and '{remote2_name}':"
+        )
+        lines.append(_SEP)
         for branch_name, comp in result.changed.items():
-            print(f"\n  Branch: {branch_name}")
-            print(f"    {remote1_name} commit: {comp.remote1}")
-            print(f"    {remote2_name} commit: {comp.remote2}")
+            lines.append(f"\n  Branch: {branch_name}")
+            lines.append(f"    {remote1_name} commit: {comp.remote1}")
+            lines.append(f"    {remote2_name} commit: {comp.remote2}")
 
     if result.no_remote1:
-        print("\n" + "=" * 80)
-        print(f"INFO: BRANCHES ONLY ON '{remote2_name}' (not on '{remote1_name}'):")
-        print("=" * 80)
+        lines.append("\n" + _SEP)
+        lines.append(
+            f"INFO: BRANCHES ONLY ON '{remote2_name}' (not on '{remote1_name}'):"
+        )
+        lines.append(_SEP)
         for branch_name, remote2_hash in result.no_remote1.items():
-            print(f"  {branch_name}: {remote2_hash[:12]}...")
+            lines.append(f"  {branch_name}: {remote2_hash[:12]}...")
 
     if result.no_remote2:
-        print("\n" + "=" * 80)
-        print(f"INFO: BRANCHES ONLY ON '{remote1_name}' (not on '{remote2_name}'):")
-        print("=" * 80)
+        lines.append("\n" + _SEP)
+        lines.append(
+            f"INFO: BRANCHES ONLY ON '{remote1_name}' (not on '{remote2_name}'):"
+        )
+        lines.append(_SEP)
         for branch_name, remote1_hash in result.no_remote2.items():
-            print(f"  {branch_name}: {remote1_hash[:12]}...")
+            lines.append(f"  {branch_name}: {remote1_hash[:12]}...")
 
     if not has_changes:
-        print("\n" + "=" * 80)
-        print(f"OK: NO DIFFERENCES DETECTED between '{remote1_name}' and '{remote2_name}'")
-        print("=" * 80)
+        lines.append("\n" + _SEP)
+        lines.append(
+            f"OK: NO DIFFERENCES DETECTED between '{remote1_name}' and '{remote2_name}'"
+        )
+        lines.append(_SEP)
         if result.unchanged:
-            print("\nBranches (both remotes match):")
+            lines.append("\nBranches (both remotes match):")
             for branch_name, commit_hash in result.unchanged.items():
-                print(f"  {branch_name}: {commit_hash[:12]}...")
+                lines.append(f"  {branch_name}: {commit_hash[:12]}...")
     else:
         if result.unchanged:
-            print("\n" + "=" * 80)
-            print(f"OK: UNCHANGED BRANCHES (match on both remotes):")
-            print("=" * 80)
+            lines.append("\n" + _SEP)
+            lines.append(f"OK: UNCHANGED BRANCHES (match on both remotes):")
+            lines.append(_SEP)
             for branch_name, commit_hash in result.unchanged.items():
-                print(f"  {branch_name}: {commit_hash[:12]}...")
+                lines.append(f"  {branch_name}: {commit_hash[:12]}...")
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -493,49 +769,72 @@ Examples:
         "Default is empty, which checks all branches.",
     )
 
+    parser.add_argument(
+        "--cache_ttl",
+        type=int,
+        default=BRANCH_CACHE_TTL_SECONDS,
+        help="Seconds to reuse branch hashes cached by a previous run while local refs "
+        f"are unchanged (default: {BRANCH_CACHE_TTL_SECONDS}, always query the remotes). "
+        "Changes pushed to the remote within that time are not detected.",
+    )
+
     args = parser.parse_args()
 
     workspace_dir = os.path.normpath(args.workspace_directory)
     remote_name = args.remote
 
-    # Parse limit_to_branch parameter
-    limit_branches = None
-    if args.limit_to_branch:
-        limit_branches = {
+    # Parse limit_to_branch parameter into an immutable (hashable) set, None if empty
+    limit_branches = (
+        frozenset(
             branch.strip()
             for branch in args.limit_to_branch.split(";")
             if branch.strip()
-        }
-        if limit_branches:
-            print(f"Limiting branch check to: {', '.join(sorted(limit_branches))}")
+        )
+        or None
+    )
+    if limit_branches:
+        print(f"Limiting branch check to: {', '.join(sorted(limit_branches))}")
 
     # Validate workspace directory
     if not os.path.isdir(workspace_dir):
         print(f"Error: Workspace directory '{workspace_dir}' does not exist")
         sys.exit(1)
 
-    # Validate remote exists
-    try:
-        cmd = ["git", "remote", "get-url", remote_name]
-        subprocess.run(cmd, cwd=workspace_dir, capture_output=True, check=True)
-    except subprocess.CalledProcessError:
-        print(f"Error: Remote '{remote_name}' not found")
-        print("Available remotes:")
-        try:
-            cmd = ["git", "remote", "-v"]
-            output = run_command_and_get_return_info(
-                cmd, cwd=workspace_dir, shell=False
-            )
-            for line in output.strip().splitlines():
-                if line.strip():
-                    print(f"  - {line.split()[0]}")
-        except:
-            pass
-        sys.exit(1)
+    # Validate remotes exist against a single `git remote` listing,
+    # before starting any work
+    remotes = get_remote_names(workspace_dir)
+    validate_remote_exists(remote_name, remotes)
+    second_remote_name = args.second_remote
+    if second_remote_name:
+        validate_remote_exists(second_remote_name, remotes, label="Second remote")
 
-    # Get local branches and compare with remote
+    # Query each remote's heads once (concurrently) and share them between passes
     print(f"Checking local branches against remote '{remote_name}'...")
-    branches = get_all_branch_hashes(workspace_dir, remote_name, limit_branches)
+    remote_names = [remote_name]
+    if second_remote_name:
+        print(
+            f"Checking remote '{remote_name}' against remote '{second_remote_name}'..."
+        )
+        remote_names.append(second_remote_name)
+    heads_by_remote = get_all_heads_by_remote(
+        workspace_dir,
+        remote_names,
+        args.cache_ttl,
+        limit_branches,
+    )
+
+    branches = get_all_branch_hashes(
+        workspace_dir, remote_name, limit_branches, heads_by_remote[remote_name]
+    )
+    remote_branches = None
+    if second_remote_name:
+        remote_branches = get_all_branch_hashes_two_remotes(
+            workspace_dir,
+            remote_name,
+            second_remote_name,
+            limit_branches,
+            heads_by_remote,
+        )
 
     if not branches:
         print(f"Error: No local branches found")
@@ -545,36 +844,10 @@ Examples:
     result = compare_branches(branches)
     print_comparison_result(result, remote_name)
 
-    # If second_remote is specified, also compare remote vs second_remote
+    # Compare remote vs second_remote
     remote_to_remote_result = None
-    if args.second_remote:
-        second_remote_name = args.second_remote
-        
-        # Validate second remote exists
-        try:
-            cmd = ["git", "remote", "get-url", second_remote_name]
-            subprocess.run(cmd, cwd=workspace_dir, capture_output=True, check=True)
-        except subprocess.CalledProcessError:
-            print(f"\nError: Second remote '{second_remote_name}' not found")
-            print("Available remotes:")
-            try:
-                cmd = ["git", "remote", "-v"]
-                output = run_command_and_get_return_info(
-                    cmd, cwd=workspace_dir, shell=False
-                )
-                for line in output.strip().splitlines():
-                    if line.strip():
-                        print(f"  - {line.split()[0]}")
-            except:
-                pass
-            sys.exit(1)
-
-        # Get branch hashes for both remotes and compare
-        print(f"\nChecking remote '{remote_name}' against remote '{second_remote_name}'...")
-        remote_branches = get_all_branch_hashes_two_remotes(
-            workspace_dir, remote_name, second_remote_name, limit_branches
-        )
-
+    if second_remote_name:
+        print(f"\nRemote '{remote_name}' against remote '{second_remote_name}':")
         if not remote_branches:
             print(f"Error: No branches found on either remote")
         else:
@@ -590,30 +863,34 @@ Examples:
         print("env.git.remoteToRemoteBranchesJson: \n", remote_to_remote_result.to_dict())
 
     # Optional TeamCity hints
-    if True:
+    if args.hint_teamcity:
         # change_detected: true if any branch has changed on remote
-        change_detected = bool(result.changed or (remote_to_remote_result and remote_to_remote_result.changed))
-        if args.hint_teamcity:
-            set_teamcity_parameter(
-                "env.git.remoteChanged", "true" if change_detected else "false"
-            )
+        change_detected = bool(
+            result.changed
+            or (remote_to_remote_result and remote_to_remote_result.changed)
+        )
+        set_teamcity_parameter(
+            "env.git.remoteChanged", "true" if change_detected else "false"
+        )
 
-        merged_dict = deep_merge(result.to_dict(), remote_to_remote_result.to_dict())
-        
-        result_json = json.dumps(merged_dict, ensure_ascii=False)
-        print("result_json: \n", result_json)
-        if args.hint_teamcity:
+        merged_dict = result.to_dict()
+        if remote_to_remote_result:
+            merged_dict = deep_merge(merged_dict, remote_to_remote_result.to_dict())
 
-            # Encode JSON as Base64URL so it can be safely passed through HTTP/CLI parameters
-            import base64
+        # Compact ASCII JSON: no whitespace to pad the Base64 output, and no codec work
+        # to encode it (non-ASCII branch names are escaped, decoding restores them)
+        result_json = json.dumps(merged_dict, ensure_ascii=True, separators=(",", ":"))
+        print("result_json: \n", result_json)
 
-            encoded_json = base64.urlsafe_b64encode(
-                result_json.encode("utf-8")
-            ).decode("ascii").rstrip("=")
-            set_teamcity_parameter("env.git.remoteBranchesJson", encoded_json)
+        # Encode JSON as Base64URL so it can be safely passed through HTTP/CLI parameters
+        import base64
 
-            print("encoded_json: \n", encoded_json)
+        encoded_json = base64.urlsafe_b64encode(
+            result_json.encode("ascii")
+        ).decode("ascii").rstrip("=")
+        set_teamcity_parameter("env.git.remoteBranchesJson", encoded_json)
 
+        print("encoded_json: \n", encoded_json)
 
 if __name__ == "__main__":
     main()
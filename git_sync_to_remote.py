@@ -10,14 +10,23 @@
 #   to avoid server limits, such as pack size limits or timeout issues when pushing many commits.
 #
 # USAGE:
-#   ./git_sync_to_remote.py <workspace_directory> [remote] [branch] [--debug] [--no-verify]
+#   ./git_sync_to_remote.py <workspace_directory> [remote] [branch] [--debug] [--yes] [--quiet|--verbose] [--no-verify|--deep-verify] [--throttle SECONDS] [--commit-graph|--no-commit-graph] [--max-pack-mb MB] [--fetch-source]
 #
 # PARAMETERS:
 #   workspace_directory (required) - Path to the git repository
 #   remote (optional)              - Destination remote name (default: destination)
 #   branch (optional)              - Branch name to sync (default: develop)
 #   --debug (optional)             - Enable debug mode (list commits per batch and require confirmation before each batch)
+#   --yes (optional)               - With --debug, list the commits per batch without asking for confirmation
+#   --quiet (optional)             - Only print failures and the summary for each batch, no command output
+#   --verbose (optional)           - Also print per-batch LFS details (implied by --debug)
 #   --no-verify (optional)         - Disable verification after each batch (default: verification enabled)
+#   --deep-verify (optional)       - Compare the whole origin and destination logs after each batch instead of the branch head
+#   --throttle (optional)          - Seconds to wait between batches to reduce server load (default: 0)
+#   --commit-graph (optional)      - Write the commit-graph before walking history, even if the repository has none yet
+#   --no-commit-graph (optional)   - Don't write the commit-graph, not even to update an existing one
+#   --max-pack-mb (optional)       - Merge consecutive batches while their estimated pack size stays below MB (default: 0, disabled)
+#   --fetch-source (optional)      - Also fetch origin, in the same git fetch as the destination (default: origin is fetched manually)
 #
 # NOTE: Source remote is always 'origin'. Script syncs: origin -> destination
 #
@@ -33,7 +42,10 @@
 #
 # CONFIGURATION:
 #   BATCH_SIZE  - Number of commits per batch (default: 50)
+#   MAX_MERGED_BATCHES - With --max-pack-mb, most batches merged into one push (default: 10)
 #   FORCE_PUSH  - Enable force push with lease protection (default: true)
+#   LFS_FETCH_JOBS - Number of concurrent git lfs fetch processes per batch (default: 4,
+#                    overridden by the LFS_FETCH_CONCURRENCY environment variable)
 #
 # HOW IT WORKS:
 #   1. Check if the workspace is a valid git repository
@@ -52,15 +64,17 @@
 #   - Checks all required parameters and git repository status
 #   - Shows detailed error messages with suggested solutions
 #   - Exits immediately on push failure with helpful diagnostics
+#   - Retries pushes rejected for rate limiting, waiting 1, 2, 4 seconds in between
 #
 # REQUIREMENTS:
 #   - Git must be installed and available in PATH
+#   - Optional: pygit2, temporary LFS fetch branches are then updated in-process
 #   - Remote must be configured with correct authentication
 #   - User must have push permissions to the target remote/branch
 #
 # NOTES:
 #   - Authentication tokens should be embedded in the remote URL
-#   - A 1-second delay is added between batches to reduce server load
+#   - Use --throttle to add a delay between batches if the server needs it
 #   - Useful for pushing large commit histories or fixing pack size errors
 #
 ###############################################################################
@@ -70,62 +84,98 @@ import sys
 import re
 import time
 import argparse
+import functools
+import hashlib
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
 # Import command runner
 from run_command import (
     run_command,
     run_command_and_get_return_info,
+    run_command_and_iter_lines,
     run_command_and_ensure_zero,
     ConsoleCommandLogger,
 )
 
 # Import utility functions
-from git_sync_util import sanitize_remote_url
+# pygit2 is None when it isn't installed, open_pygit2_repository then returns None
+from git_sync_util import (
+    RefResolver,
+    open_pygit2_repository,
+    pygit2,
+    sanitize_remote_url,
+)
 
 # Configuration
 SOURCE_REMOTE = "origin"  # Always sync from origin
 BATCH_SIZE = 50
+# One push merged by --max-pack-mb holds at most this many batches, so it never
+# has more than BATCH_SIZE * MAX_MERGED_BATCHES commits however small they are
+MAX_MERGED_BATCHES = 10
 FORCE_PUSH = True
+LFS_FETCH_JOBS = 4
+# Environment variable overriding LFS_FETCH_JOBS
+LFS_FETCH_CONCURRENCY_ENV = "LFS_FETCH_CONCURRENCY"
 REGEX_PUSH_ERROR = "ERROR"
+PUSH_ERROR_PATTERN = re.compile(REGEX_PUSH_ERROR, re.IGNORECASE)
+# Push output of a server that rejected the push for sending too fast. 429 only
+# counts as the HTTP status, it also shows up in object counts and sizes
+PUSH_RATE_LIMIT_PATTERN = re.compile(
+    r"rate.?limit|slow.?down|too many requests"
+    r"|\bHTTP(?:/[\d.]+)? 429\b|returned error: 429\b",
+    re.IGNORECASE,
+)
+PUSH_RATE_LIMIT_RETRIES = 3  # Retries of a rate-limited push, waiting 1, 2, 4s...
+PUSH_RETRY_MAX_DELAY = 30  # Seconds
+# Error lines in git fetch output, matched anywhere in the line
+FETCH_ERROR_PATTERN = re.compile(r"error", re.IGNORECASE)
 
-# Get script directory for temp folder
-SCRIPT_DIR = Path(__file__).parent.absolute()
+# Environment for read-only git commands (log, rev-list, show-ref, ...): they
+# never need the optional index refresh/lock, so it is skipped
+_GIT_READONLY_ENV = {**os.environ, "GIT_OPTIONAL_LOCKS": "0"}
 
 # Global command logger for functions that don't have context access
 _global_cmd_logger = ConsoleCommandLogger(prefix="[CMD]")
 
 
-# Regex pattern to match lines that are solid with graph symbols: |, \, //, etc.
-# This matches lines that are entirely composed of |, /, \, spaces, tabs, and *
-GIT_GRAPH_SYMBOL_REGEX = r"^[|/\\\s*]+"
-GIT_GRAPH_SYMBOL_REGEX_PATTERN = re.compile(GIT_GRAPH_SYMBOL_REGEX + "$", re.IGNORECASE)
-GIT_GRAPH_SYMBOL_REGEX_PATTERN_LEADING = re.compile(
-    GIT_GRAPH_SYMBOL_REGEX, re.IGNORECASE
+# git log format parsed by filter_valid_commits: hash, parent hashes, subject
+GIT_LOG_FORMAT = "%H%x09%P%x09%s"
+# One match per GIT_LOG_FORMAT line gives the hash, the first parent hash (none
+# for a root commit) and the subject without surrounding whitespace
+GIT_LOG_LINE_PATTERN = re.compile(
+    r"([0-9a-fA-F]{40})\t([0-9a-fA-F]{40})?[^\t]*\t\s*(.*?)\s*$"
 )
 
+# Any character that can't be part of a commit hash, used to validate hashes in one scan
+NON_HEX_CHAR_PATTERN = re.compile(r"[^0-9a-fA-F]")
+
 
+@dataclass(frozen=True, eq=False)
 class CommitInfo:
     """Commit info class to hold commit hash and message."""
 
-    def __init__(self, hash: str, message: str, is_sub_line_of_merge_commit: bool):
-        self.hash = hash
-        self.message = message
-        self.is_sub_line_of_merge_commit = is_sub_line_of_merge_commit
+    # One instance per commit of the branch, slots keep them small
+    __slots__ = ("hash", "message", "is_sub_line_of_merge_commit")
+
+    hash: str
+    message: str
+    is_sub_line_of_merge_commit: bool
 
     def __str__(self):
         return f"{self.hash} - {self.message}{'(sub-commit)' if self.is_sub_line_of_merge_commit else ''}"
 
     def __eq__(self, other):
-        """Two commits are equal if they have the same hash and message."""
+        """Two commits are equal if they have the same hash."""
         if not isinstance(other, CommitInfo):
             return False
         return self.hash == other.hash
 
-    def __ne__(self, other):
-        """Two commits are not equal if they differ in hash or message."""
-        return not self.__eq__(other)
+    def __hash__(self):
+        """Hash on the commit hash only, consistent with __eq__."""
+        return hash(self.hash)
 
 
 class Context:
@@ -138,15 +188,30 @@ class Context:
         self.dest_remote = None
         self.branch = None
         self.debug_mode = False
+        self.confirm_batches = False  # Ask before each batch (debug mode without --yes)
+        self.verbosity = 1  # 0: quiet, 1: default, 2: verbose
+        self.echo_commands = True  # Print the git commands run in the batch loop
         self.verify = True
+        self.deep_verify = False  # Always compare the logs line by line
+        self.throttle = 0  # Seconds to wait between batches
+        # "write": always write the commit-graph, "update": only update an
+        # existing one, "off": never touch it
+        self.commit_graph = "update"
+        self.max_pack_bytes = 0  # Merge small batches below this size, 0 disables
+        self.fetch_source = False  # Fetch origin together with the destination
 
         # Push configuration
         self.push_options = []
+        # "git push <options> <dest_remote>", built once the push options are known
+        self.push_cmd_prefix = []
+        self.push_cmd_prefix_str = ""
 
         # Verification state
         self.temp_dir = None
-        self.origin_log_file = None
-        self.origin_log_lines = None  # Cached origin branch log lines
+        self.origin_log_file = None  # Written only when verification fails
+        self.origin_commits = None  # Cached origin branch commits, oldest first
+        self.origin_hash_to_idx = None  # Commit hash -> index in origin_commits
+        self.source_head_hash = None  # Origin branch tip, keys the origin log cache
 
         # Commit information
         self.commits: list[CommitInfo] = []
@@ -159,10 +224,19 @@ class Context:
         # Destination branch state (for LFS range calculation)
         self.dest_head_hash = None
 
+        # Long-lived cat-file process for the ref lookups of the whole sync
+        self.ref_resolver = None
+
         # Command logger for separating command output from main process logs
         self.cmd_logger = ConsoleCommandLogger(prefix="[SUBCMD]")
 
 
+def vprint(ctx: Context, level: int, *args):
+    """Print the message if ctx.verbosity is at least level."""
+    if ctx.verbosity >= level:
+        print(*args)
+
+
 def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -174,6 +248,7 @@ Examples:
   %(prog)s /path/to/repo destination 2025.1-lts
   %(prog)s /path/to/repo destination develop --debug
   %(prog)s /path/to/repo destination develop --no-verify
+  %(prog)s /path/to/repo destination develop --throttle 1
         """,
     )
 
@@ -196,10 +271,62 @@ Examples:
         help="Enable debug mode (list commits per batch and require confirmation before each batch)",
     )
     parser.add_argument(
+        "--yes",
+        action="store_true",
+        help="With --debug, list the commits per batch without asking for confirmation",
+    )
+    verbosity_group = parser.add_mutually_exclusive_group()
+    verbosity_group.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Only print failures and the summary for each batch, no command output",
+    )
+    verbosity_group.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Also print per-batch LFS details (implied by --debug)",
+    )
+    verify_group = parser.add_mutually_exclusive_group()
+    verify_group.add_argument(
         "--no-verify",
         action="store_true",
         help="Disable verification after each batch (default: verification enabled)",
     )
+    verify_group.add_argument(
+        "--deep-verify",
+        action="store_true",
+        help="Compare the whole origin and destination logs after each batch instead of the branch head",
+    )
+    parser.add_argument(
+        "--throttle",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="Seconds to wait between batches to reduce server load (default: 0)",
+    )
+    commit_graph_group = parser.add_mutually_exclusive_group()
+    commit_graph_group.add_argument(
+        "--commit-graph",
+        action="store_true",
+        help="Write the commit-graph before walking history, even if the repository has none yet",
+    )
+    commit_graph_group.add_argument(
+        "--no-commit-graph",
+        action="store_true",
+        help="Don't write the commit-graph, not even to update an existing one",
+    )
+    parser.add_argument(
+        "--max-pack-mb",
+        type=float,
+        default=0,
+        metavar="MB",
+        help="Merge consecutive batches while their estimated pack size stays below MB (default: 0, disabled)",
+    )
+    parser.add_argument(
+        "--fetch-source",
+        action="store_true",
+        help="Also fetch origin, in the same git fetch as the destination (default: origin is fetched manually)",
+    )
 
     return parser.parse_args()
 
@@ -213,26 +340,25 @@ def validate_workspace_directory(workspace_dir):
 
 def validate_remote(workspace_dir, remote_name):
     """Validate that remote exists and return its URL."""
+    # get-url fails for unknown remotes, so one call both validates and gets the URL
     cmd = ["git", "remote", "get-url", remote_name]
-    result = run_command(cmd, cwd=workspace_dir)
-
-    if result != 0:
+    try:
+        output = run_command_and_get_return_info(
+            cmd, cwd=workspace_dir, shell=False, env=_GIT_READONLY_ENV
+        )
+        remote_url = output.strip()
+        return remote_url
+    except subprocess.CalledProcessError:
         print(f"Error: Remote '{remote_name}' not found")
         print("Available remotes:")
         run_command(
-            ["git", "remote", "-v"], cwd=workspace_dir, logger=_global_cmd_logger
+            ["git", "remote", "-v"],
+            cwd=workspace_dir,
+            logger=_global_cmd_logger,
+            env=_GIT_READONLY_ENV,
         )
         sys.exit(1)
 
-    # Get remote URL
-    try:
-        output = run_command_and_get_return_info(cmd, cwd=workspace_dir, shell=False)
-        remote_url = output.strip()
-        return remote_url
-    except subprocess.CalledProcessError as e:
-        print(f"Error: Failed to get remote URL for '{remote_name}': {e}")
-        sys.exit(1)
-
 
 def confirm_origin_push(remote_name):
     """Ask for confirmation if pushing to origin."""
@@ -247,141 +373,257 @@ def confirm_origin_push(remote_name):
         print("")
 
 
-def validate_branch_exists(workspace_dir, remote_name, branch_name):
-    """Validate that branch exists on the specified remote."""
+def validate_branch_exists(workspace_dir, remote_name, branch_name, resolver=None):
+    """Validate that branch exists on the specified remote.
+
+    With a RefResolver the ref is looked up through its cat-file process,
+    otherwise a RefResolver is started for this one lookup.
+
+    Returns:
+        str: The commit hash the remote branch points at
+    """
     ref = f"refs/remotes/{remote_name}/{branch_name}"
-    cmd = ["git", "show-ref", "--quiet", "--verify", ref]
-    result = run_command(cmd, cwd=workspace_dir)
+    try:
+        if resolver is not None:
+            commit_hash = resolver.resolve(ref)
+        else:
+            with RefResolver(workspace_dir, env=_GIT_READONLY_ENV) as one_shot:
+                commit_hash = one_shot.resolve(ref)
+    except (OSError, ValueError) as e:
+        # git missing, or the process died (broken pipe / closed stream)
+        print(f"Error: Failed to look up {ref}: {e}")
+        sys.exit(1)
 
-    if result != 0:
+    if commit_hash is None:
         print(f"Error: Branch '{branch_name}' not found on remote '{remote_name}'")
         print(f"Available branches on {remote_name}:")
-        # Filter branches to show only the relevant remote
-        run_command(
-            ["git", "branch", "-r"], cwd=workspace_dir, logger=_global_cmd_logger
-        )
-        # Also show filtered output for clarity
+        # Run git branch -r once, show all branches and then the relevant remote's
         try:
             output = run_command_and_get_return_info(
-                ["git", "branch", "-r"], cwd=workspace_dir, shell=False
+                ["git", "branch", "-r"],
+                cwd=workspace_dir,
+                shell=False,
+                env=_GIT_READONLY_ENV,
             )
-            filtered = [
-                line.strip()
-                for line in output.strip().splitlines()
-                if line.strip().startswith(f"{remote_name}/")
-            ]
-            if filtered:
-                print("Filtered branches:")
-                for branch in filtered:
-                    print(f"  {branch}")
         except subprocess.CalledProcessError:
-            pass  # Already showed all branches above
+            sys.exit(1)
+        branches = [line.strip() for line in output.splitlines() if line.strip()]
+        for branch in branches:
+            _global_cmd_logger.info(branch)
+        # Also show filtered output for clarity
+        filtered = [
+            branch for branch in branches if branch.startswith(f"{remote_name}/")
+        ]
+        if filtered:
+            print("Filtered branches:")
+            for branch in filtered:
+                print(f"  {branch}")
         sys.exit(1)
+    return commit_hash
 
 
-def filter_valid_commits(lines: list[str], debug_mode: bool) -> list[CommitInfo]:
-    """Filter out commits that are not valid."""
-    # Parse lines to extract commit hash and message, and create CommitInfo objects
-    # Format with --graph: graph_symbols commit_hash commit_message
-    # Commit hash is always 40 hex characters
+def filter_valid_commits(lines, debug_mode: bool) -> list[CommitInfo]:
+    """Parse git log lines in GIT_LOG_FORMAT into CommitInfo objects.
+
+    Lines must be in git log's topological order (newest first), the commits are
+    returned in chronological order (oldest first). Commits that are not on the
+    first-parent chain of the branch tip are flagged as sub-commits of a merge.
+    """
     commits = []
-    # Compile regex once for performance
-    hash_pattern = re.compile(r"\b([0-9a-f]{40})\b", re.IGNORECASE)
+    # Hash the next first-parent chain commit must have, None until the tip is seen
+    first_parent_hash = None
 
     for line in lines:
-        line_stripped = line.strip()
-        if not line_stripped:
-            continue
-        # Skip lines that are entirely graph symbols (same approach as verify_logs)
-        if GIT_GRAPH_SYMBOL_REGEX_PATTERN.match(line_stripped):
+        if not line:
             continue
 
-        # Remove leading graph symbols from lines that have content (same approach as verify_logs)
-        cleaned_line = GIT_GRAPH_SYMBOL_REGEX_PATTERN_LEADING.sub("", line).strip()
-
-        is_sub_line_of_merge_commit = False
-        if line_stripped.startswith("|"):  # It's a sub line of a merge commit
-            is_sub_line_of_merge_commit = True
-
-        # Find the 40-character hex string (commit hash) in the cleaned line
-        hash_match = hash_pattern.search(cleaned_line)
-        if hash_match:
-            commit_hash = hash_match.group(1)
-            # Get everything after the hash as the message
-            hash_pos = hash_match.end()
-            commit_msg = cleaned_line[hash_pos:].strip()
-            # Create CommitInfo object
-            commits.append(
-                CommitInfo(commit_hash, commit_msg, is_sub_line_of_merge_commit)
-            )
-        else:
+        line_match = GIT_LOG_LINE_PATTERN.match(line)
+        if not line_match:
             # Fallback: if no hash found, skip this line (shouldn't happen)
             if debug_mode:
                 print(f"Warning: Could not parse commit hash from line: {line[:80]}")
+            continue
+
+        commit_hash, parent_hash, commit_msg = line_match.groups()
+        is_sub_line_of_merge_commit = (
+            first_parent_hash is not None and commit_hash != first_parent_hash
+        )
+        if not is_sub_line_of_merge_commit:
+            # A root commit ends the chain, "" matches no further commit
+            first_parent_hash = parent_hash or ""
+
+        commits.append(
+            CommitInfo(commit_hash, commit_msg, is_sub_line_of_merge_commit)
+        )
 
     # Reverse to get chronological order (oldest first)
-    # commits = list(reversed(commits))
-    print(f"Found {len(commits)} commits to push (including merge commits)")
+    commits.reverse()
+    return commits
+
+
+def get_branch_commits(ctx: Context, remote_name: str) -> list[CommitInfo]:
+    """Get the commits of remote_name/branch in chronological order (oldest first).
+
+    Parses `git log --topo-order` output, batch planning depends on that order.
+
+    Raises:
+        subprocess.CalledProcessError: If git log fails
+    """
+    # --topo-order is the order --graph used to imply, without drawing the graph
+    cmd = [
+        "git",
+        "log",
+        f"{remote_name}/{ctx.branch}",
+        "--topo-order",
+        f"--format={GIT_LOG_FORMAT}",
+    ]
+    # Parse lines while git log is still writing them, the history is never
+    # held in memory as one string
+    lines = run_command_and_iter_lines(
+        cmd, cwd=ctx.workspace_dir, env=_GIT_READONLY_ENV, echo=ctx.echo_commands
+    )
+    commits = filter_valid_commits(lines, ctx.debug_mode)
+
+    vprint(
+        ctx, 1, f"Found {len(commits)} commits to push (including merge commits)"
+    )
     return commits
 
 
+def write_commit_log(log_file: Path, commits: list[CommitInfo]):
+    """Write commits to a log file, one `hash message` line per commit."""
+    # Use newline='\n' to ensure consistent LF line endings on Windows/MINGW
+    with open(log_file, "w", encoding="utf-8", newline="\n") as f:
+        for commit in commits:
+            f.write(f"{commit.hash} {commit.message}\n")
+
+
+def get_commit_cache_file(ctx: Context, remote_name: str, head_hash: str) -> Path:
+    """Path of the commit cache of remote_name/branch at head_hash.
+
+    The file is commits_<ref key>_<head hash>.cache, the ref key is a hash of the
+    full ref name: branch names may contain "/" and "_", or differ only in case
+    on a case-insensitive file system, so they can't be used in the name as is.
+    """
+    ref_name = f"refs/remotes/{remote_name}/{ctx.branch}"
+    ref_key = hashlib.sha1(ref_name.encode("utf-8")).hexdigest()
+    return ctx.temp_dir / f"commits_{ref_key}_{head_hash}.cache"
+
+
+def parse_commit_cache_file_name(cache_file: Path):
+    """Split a get_commit_cache_file name into (ref key, head hash).
+
+    Returns:
+        tuple[str, str]: The ref key and head hash, or None for other files
+    """
+    parts = cache_file.name.split("_")
+    if len(parts) != 3 or parts[0] != "commits" or not parts[2].endswith(".cache"):
+        return None
+    return parts[1], parts[2][: -len(".cache")]
+
+
+def load_commit_cache(cache_file: Path, head_hash: str):
+    """Read commits written by save_commit_cache, or return None if unusable.
+
+    A commit hash covers its whole history, so the cache of a branch tip never
+    goes stale. It is only rejected when it can't be parsed or doesn't end at
+    head_hash (e.g. a write that was cut short).
+    """
+    commits = []
+    try:
+        with open(cache_file, "r", encoding="utf-8", newline="\n") as f:
+            for line in f:
+                commit_hash, flag, commit_msg = line.rstrip("\n").split(" ", 2)
+                if flag not in ("0", "1"):
+                    return None
+                commits.append(CommitInfo(commit_hash, commit_msg, flag == "1"))
+    except (OSError, ValueError):
+        return None
+    if not commits or commits[-1].hash != head_hash:
+        return None
+    return commits
+
+
+def save_commit_cache(cache_file: Path, commits: list[CommitInfo]):
+    """Write commits to cache_file and remove the caches of older tips.
+
+    Lines are `hash flag message`, flag is 1 for sub-commits of a merge. The file
+    is written next to its final name and renamed, so it is never seen half
+    written. Only caches of the same ref are removed. Failures only cost the
+    cache, they are not fatal.
+    """
+    ref_key = parse_commit_cache_file_name(cache_file)[0]
+    tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+    try:
+        with open(tmp_file, "w", encoding="utf-8", newline="\n") as f:
+            f.writelines(
+                f"{commit.hash} {int(commit.is_sub_line_of_merge_commit)} {commit.message}\n"
+                for commit in commits
+            )
+        os.replace(tmp_file, cache_file)
+        for old_file in cache_file.parent.glob("commits_*.cache"):
+            parsed = parse_commit_cache_file_name(old_file)
+            if parsed and parsed[0] == ref_key and old_file != cache_file:
+                old_file.unlink()
+    except OSError as e:
+        print(f"Warning: Failed to write commit cache {cache_file}: {e}")
+
+
 def get_commits_to_push(ctx: Context) -> list:
     """Get list of commits to push in chronological order.
 
     Gets the HEAD commit of destination branch, finds it in the cached origin log,
     and returns all commits after that point. This preserves graph structure.
     """
-    if ctx.origin_log_lines is None:
+    if ctx.origin_commits is None:
         print("Error: Origin log not cached. setup_verification must be called first.")
         sys.exit(1)
 
-    # Get destination branch HEAD commit hash and commit count
-    # Get both upfront to avoid conditional second call
+    # Get destination branch HEAD commit hash
     print(f"Getting destination branch info: {ctx.dest_remote}/{ctx.branch}")
 
-    # Get commit count
-    cmd_count = ["git", "rev-list", "--count", f"{ctx.dest_remote}/{ctx.branch}"]
-    try:
-        count_output = run_command_and_get_return_info(
-            cmd_count, cwd=ctx.workspace_dir, shell=False
-        )
-        dest_commit_count = int(count_output.strip())
-    except subprocess.CalledProcessError as e:
-        print(f"Error: Failed to get destination branch commit count: {e}")
-        sys.exit(1)
-
-    # Get HEAD hash
-    cmd_head = ["git", "rev-parse", f"{ctx.dest_remote}/{ctx.branch}"]
-    try:
-        dest_head_output = run_command_and_get_return_info(
-            cmd_head, cwd=ctx.workspace_dir, shell=False
-        )
-        dest_head_hash = dest_head_output.strip()
-        ctx.dest_head_hash = (
-            dest_head_hash  # Store in context for LFS range calculation
-        )
-        print(
-            f"Destination HEAD: {dest_head_hash} (branch has {dest_commit_count} commit(s))"
-        )
-    except subprocess.CalledProcessError as e:
-        print(f"Error: Failed to get destination branch HEAD: {e}")
-        sys.exit(1)
+    # Get HEAD hash, main already resolved it when validating the branch
+    dest_head_hash = ctx.dest_head_hash
+    if dest_head_hash is None:
+        dest_ref = f"refs/remotes/{ctx.dest_remote}/{ctx.branch}"
+        try:
+            if ctx.ref_resolver is not None:
+                dest_head_hash = ctx.ref_resolver.resolve(dest_ref)
+            else:
+                with RefResolver(ctx.workspace_dir, env=_GIT_READONLY_ENV) as resolver:
+                    dest_head_hash = resolver.resolve(dest_ref)
+        except (OSError, ValueError) as e:
+            # git missing, or the process died (broken pipe / closed stream)
+            print(f"Error: Failed to get destination branch HEAD: {e}")
+            sys.exit(1)
+        if dest_head_hash is None:
+            print(
+                f"Error: Failed to get destination branch HEAD: {dest_ref} not found"
+            )
+            sys.exit(1)
+        # Store in context for LFS range calculation
+        ctx.dest_head_hash = dest_head_hash
+    print(f"Destination HEAD: {dest_head_hash}")
 
-    # Parse origin log into CommitInfo objects
-    origin_commits = filter_valid_commits(
-        reversed(ctx.origin_log_lines), ctx.debug_mode
-    )
+    origin_commits = ctx.origin_commits
 
     # Find the destination HEAD in the origin log
-    dest_head_idx = None
-    for idx, commit in enumerate(origin_commits):
-        if commit.hash == dest_head_hash:
-            dest_head_idx = idx
-            break
+    dest_head_idx = ctx.origin_hash_to_idx.get(dest_head_hash)
 
     if dest_head_idx is None:
         # Destination HEAD not found in origin log
         print(f"Warning: Destination HEAD {dest_head_hash} not found in origin log.")
+
+        # The commit count is only needed to tell a diverged branch from a new one
+        cmd_count = ["git", "rev-list", "--count", f"{ctx.dest_remote}/{ctx.branch}"]
+        try:
+            count_output = run_command_and_get_return_info(
+                cmd_count, cwd=ctx.workspace_dir, shell=False, env=_GIT_READONLY_ENV
+            )
+            dest_commit_count = int(count_output.strip())
+        except subprocess.CalledProcessError as e:
+            print(f"Error: Failed to get destination branch commit count: {e}")
+            sys.exit(1)
         print(f"Destination branch has {dest_commit_count} commit(s)")
 
         if dest_commit_count > 1:
@@ -430,64 +672,74 @@ def get_commits_to_push(ctx: Context) -> list:
     return commits_to_push
 
 
-def verify_logs(ctx: Context) -> bool:
-    """Verify logs by comparing origin and destination branch logs."""
+def verify_logs(ctx: Context, expected_head: str = None) -> bool:
+    """Verify logs by comparing origin and destination branch logs.
+
+    With expected_head (the commit just pushed, or the destination HEAD the
+    sync started from), the destination branch only needs to point at that
+    commit: a commit hash covers its whole history, so an equal head means the
+    destination log is exactly that part of the origin log. The logs are only
+    compared line by line without expected_head, when the heads differ or with
+    --deep-verify.
+    """
     if not ctx.verify:
         return True
 
-    # Fetch latest state from destination remote
+    # Fetch latest state of the synced branch from destination remote, the
+    # other destination refs were fetched at startup and don't matter here
     # git fetch outputs info to stderr, so use stderr_to_stdout=True to treat it as normal output
     # error_regex will catch actual error messages
+    fetch_cmd = ["git", "fetch", "--force"]
+    if expected_head is not None:
+        # The expected head is a local commit, negotiating from it alone keeps
+        # the have lines short
+        fetch_cmd.append(f"--negotiation-tip={expected_head}")
+    fetch_cmd += [
+        ctx.dest_remote,
+        f"+refs/heads/{ctx.branch}:refs/remotes/{ctx.dest_remote}/{ctx.branch}",
+    ]
     run_command(
-        ["git", "fetch", "--force", ctx.dest_remote],
+        fetch_cmd,
         cwd=ctx.workspace_dir,
         logger=ctx.cmd_logger,
         stderr_to_stdout=True,
-        error_regex=".*error.*",
+        error_regex=FETCH_ERROR_PATTERN,
+        echo=ctx.echo_commands,
     )
 
+    if expected_head is not None and not ctx.deep_verify:
+        dest_ref = f"refs/remotes/{ctx.dest_remote}/{ctx.branch}"
+        try:
+            # Every batch reuses the same process, cat-file reads the ref again
+            # on each lookup so it sees the fetch above
+            if ctx.ref_resolver is None:
+                ctx.ref_resolver = RefResolver(ctx.workspace_dir, env=_GIT_READONLY_ENV)
+            dest_head_hash = ctx.ref_resolver.resolve(dest_ref)
+        except (OSError, ValueError) as e:
+            # git missing, or the process died (broken pipe / closed stream),
+            # the next batch starts a new process
+            dest_head_hash = None
+            ctx.ref_resolver = None
+            print(f"Warning: Failed to get destination branch HEAD: {e}")
+        if dest_head_hash == expected_head:
+            vprint(
+                ctx,
+                1,
+                f"[VERIFY] equal - {ctx.dest_remote}/{ctx.branch} is at {expected_head}",
+            )
+            return True
+        print(
+            f"[VERIFY] {ctx.dest_remote}/{ctx.branch} is at {dest_head_hash}, expected {expected_head}, comparing logs..."
+        )
+
     # Get destination's branch log
-    dest_log_file = ctx.temp_dir / f"{ctx.dest_remote}_{ctx.branch}.txt"
-    cmd = [
-        "git",
-        "log",
-        f"{ctx.dest_remote}/{ctx.branch}",
-        "--graph",
-        "--oneline",
-        "--pretty=format:%H %s",
-    ]
     try:
-        output = run_command_and_get_return_info(
-            cmd, cwd=ctx.workspace_dir, shell=False
-        )
-        # Reverse the output (equivalent to tac)
-        lines = output.strip().splitlines()
-        reversed_lines = list(reversed(lines))
-        # Use newline='\n' to ensure consistent LF line endings on Windows/MINGW
-        with open(dest_log_file, "w", encoding="utf-8", newline="\n") as f:
-            f.write("\n".join(reversed_lines))
-            if reversed_lines:
-                f.write("\n")
+        dest_clean = get_branch_commits(ctx, ctx.dest_remote)
     except subprocess.CalledProcessError as e:
         print(f"Error: Failed to get destination log: {e}")
         return False
 
-    # Read and clean both logs
-    # Use newline='\n' to ensure consistent LF line endings when reading on Windows/MINGW
-    with open(ctx.origin_log_file, "r", encoding="utf-8", newline="\n") as f:
-        origin_lines = f.readlines()
-
-    with open(dest_log_file, "r", encoding="utf-8", newline="\n") as f:
-        dest_lines = f.readlines()
-
-    # Remove lines that are solid with graph symbols (|, \, //) and clean lines
-    # Pattern 1: Match lines that are entirely graph symbols (to skip them)
-    #
-    #  Pattern 2: Remove leading graph symbols from lines that have content
-
-    origin_clean = filter_valid_commits(origin_lines, ctx.debug_mode)
-
-    dest_clean = filter_valid_commits(dest_lines, ctx.debug_mode)
+    origin_clean = ctx.origin_commits
 
     # Count lines
     origin_lines_count = len(origin_clean)
@@ -498,62 +750,102 @@ def verify_logs(ctx: Context) -> bool:
         print("[VERIFY] Warning: No lines to compare")
         return True
 
-    # Compare first min_lines lines
-    origin_compare = origin_clean[:min_lines]
-    dest_compare = dest_clean[:min_lines]
+    # Compare first min_lines lines (zip stops at the shorter log), stopping at
+    # the first mismatch instead of copying both logs into slices first
+    mismatch_idx = next(
+        (
+            idx
+            for idx, (origin_commit, dest_commit) in enumerate(
+                zip(origin_clean, dest_clean)
+            )
+            if origin_commit != dest_commit
+        ),
+        None,
+    )
 
-    if origin_compare == dest_compare:
-        print(f"[VERIFY] equal - logs match (compared first {min_lines} lines)")
+    if mismatch_idx is None:
+        vprint(
+            ctx, 1, f"[VERIFY] equal - logs match (compared first {min_lines} lines)"
+        )
         return True
     else:
         print("[VERIFY] FAILED - logs do not match!")
 
-        # Find first mismatched line and its line number (1-indexed)
-        first_mismatch_line_num = None
-        first_mismatch_origin = None
-        first_mismatch_dest = None
-        for idx in range(min_lines):
-            if origin_compare[idx] != dest_compare[idx]:
-                first_mismatch_line_num = idx + 1  # 1-indexed
-                first_mismatch_origin = origin_compare[idx]
-                first_mismatch_dest = dest_compare[idx]
-                break
-
-        # Print first mismatch information
-        if first_mismatch_line_num is not None:
-            print(f"First mismatch at line {first_mismatch_line_num}:")
-            print(f"  Origin:   {first_mismatch_origin}, file: {ctx.origin_log_file}")
-            print(f"  Dest:     {first_mismatch_dest}, file: {dest_log_file}")
-            print("")
+        # Logs are compared in memory, they are only written out for inspection
+        # when they don't match
+        dest_log_file = ctx.temp_dir / f"{ctx.dest_remote}_{ctx.branch}.txt"
+        write_commit_log(ctx.origin_log_file, origin_clean)
+        write_commit_log(dest_log_file, dest_clean)
+
+        # The report is collected and written at once
+        # First mismatch information (line numbers are 1-indexed)
+        lines = [
+            f"First mismatch at line {mismatch_idx + 1}:",
+            f"  Origin:   {origin_clean[mismatch_idx]}, file: {ctx.origin_log_file}",
+            f"  Dest:     {dest_clean[mismatch_idx]}, file: {dest_log_file}",
+            "",
+        ]
 
-        # Print 10 lines from both sides starting from the mismatch line
-        mismatch_idx = first_mismatch_line_num - 1 if first_mismatch_line_num else 0
-        start_idx = max(0, mismatch_idx)
-        end_idx = min(len(origin_compare), mismatch_idx + 10)
+        # 10 lines from both sides starting from the mismatch line
+        start_idx = mismatch_idx
+        end_idx = min(min_lines, mismatch_idx + 10)
 
-        print(
-            f"Origin log (lines {start_idx + 1} to {end_idx} of {min_lines} compared lines):"
-        )
-        if start_idx > 0:
-            print("...")
-        for i in range(start_idx, end_idx):
-            print(f"  {i + 1}: {origin_compare[i]}")
-        if end_idx < len(origin_compare):
-            print("...")
-        print("")
+        for title, log in (("Origin", origin_clean), ("Destination", dest_clean)):
+            lines.append(
+                f"{title} log (lines {start_idx + 1} to {end_idx} of {min_lines} compared lines):"
+            )
+            if start_idx > 0:
+                lines.append("...")
+            lines.extend(f"  {i + 1}: {log[i]}" for i in range(start_idx, end_idx))
+            if end_idx < min_lines:
+                lines.append("...")
+            lines.append("")
+        lines.append("Stopping sync due to verification failure")
+        sys.stdout.write("\n".join(lines) + "\n")
+        return False
 
-        print(
-            f"Destination log (lines {start_idx + 1} to {end_idx} of {min_lines} compared lines):"
-        )
-        if start_idx > 0:
-            print("...")
-        for i in range(start_idx, end_idx):
-            print(f"  {i + 1}: {dest_compare[i]}")
-        if end_idx < len(dest_compare):
-            print("...")
-        print("")
-        print("Stopping sync due to verification failure")
+
+def has_commit_graph(ctx: Context):
+    """Check whether the repository already has a commit-graph file or chain."""
+    try:
+        objects_info = run_command_and_get_return_info(
+            ["git", "rev-parse", "--git-path", "objects/info"],
+            cwd=ctx.workspace_dir,
+            shell=False,
+            env=_GIT_READONLY_ENV,
+            echo=ctx.echo_commands,
+        ).strip()
+    except (subprocess.CalledProcessError, OSError):
         return False
+    objects_info = Path(ctx.workspace_dir) / objects_info
+    return (objects_info / "commit-graph").is_file() or (
+        objects_info / "commit-graphs" / "commit-graph-chain"
+    ).is_file()
+
+
+def write_commit_graph(ctx: Context, changed_paths=False):
+    """Write or update the repository's commit-graph file.
+
+    git log and rev-list read commit parents from the commit-graph instead of
+    parsing every commit object, which matters on long histories. --split only
+    writes a new layer for commits that aren't in the graph yet, so it's cheap
+    when the graph is already there. The first write of a long history, above
+    all with --changed-paths, can take well over the default command timeout, so
+    none is used. Without --changed-paths, git keeps writing the changed-path
+    filters only if the existing graph has them. Failure is not fatal (e.g. old git).
+    """
+    cmd = ["git", "commit-graph", "write", "--reachable", "--split"]
+    if changed_paths:
+        cmd.append("--changed-paths")
+    result = run_command(
+        cmd,
+        cwd=ctx.workspace_dir,
+        logger=ctx.cmd_logger,
+        timeout=None,
+        echo=ctx.echo_commands,
+    )
+    if result != 0:
+        print(f"Warning: Failed to write commit-graph (return code: {result})")
 
 
 def setup_verification(ctx: Context):
@@ -565,34 +857,43 @@ def setup_verification(ctx: Context):
     ctx.temp_dir = Path(ctx.workspace_dir) / "temp"
     ctx.temp_dir.mkdir(parents=True, exist_ok=True)
 
-    # Get origin's branch log and cache it
+    # Speed up the history walks below and in the batch loop. A new graph is
+    # only written on request, the first write is slow on long histories
+    if ctx.commit_graph == "write":
+        write_commit_graph(ctx, changed_paths=True)
+    elif ctx.commit_graph == "update" and has_commit_graph(ctx):
+        write_commit_graph(ctx)
+
+    # Get origin's branch log and cache it, the file is only written when
+    # verification fails
     ctx.origin_log_file = ctx.temp_dir / f"{ctx.source_remote}_{ctx.branch}.txt"
-    print(f"Capturing origin branch log: {ctx.origin_log_file}")
+    print(f"Capturing origin branch log: {ctx.source_remote}/{ctx.branch}")
 
-    cmd = [
-        "git",
-        "log",
-        f"{ctx.source_remote}/{ctx.branch}",
-        "--graph",
-        "--oneline",
-        "--format=%H %s",
-    ]
     try:
-        output = run_command_and_get_return_info(
-            cmd, cwd=ctx.workspace_dir, shell=False
-        )
-        # Store the lines (not reversed) - we'll reverse when processing
-        ctx.origin_log_lines = output.strip().splitlines()
-
-        # Reverse the output for saving to file (equivalent to tac)
-        reversed_lines = list(reversed(ctx.origin_log_lines))
-        # Use newline='\n' to ensure consistent LF line endings on Windows/MINGW
-        with open(ctx.origin_log_file, "w", encoding="utf-8", newline="\n") as f:
-            f.write("\n".join(reversed_lines))
-            if reversed_lines:
-                f.write("\n")
+        # Reruns on an unchanged origin branch (e.g. after a failed push) read the
+        # commits from the cache instead of walking the history again
+        cache_file = None
+        if ctx.source_head_hash is not None:
+            cache_file = get_commit_cache_file(
+                ctx, ctx.source_remote, ctx.source_head_hash
+            )
+            ctx.origin_commits = load_commit_cache(cache_file, ctx.source_head_hash)
+            if ctx.origin_commits is not None:
+                print(f"Read origin branch log from cache: {cache_file}")
+        if ctx.origin_commits is None:
+            ctx.origin_commits = get_branch_commits(ctx, ctx.source_remote)
+            # Only cache the log if it was read at the tip the cache is named after
+            if (
+                cache_file is not None
+                and ctx.origin_commits
+                and ctx.origin_commits[-1].hash == ctx.source_head_hash
+            ):
+                save_commit_cache(cache_file, ctx.origin_commits)
+        ctx.origin_hash_to_idx = {
+            commit.hash: idx for idx, commit in enumerate(ctx.origin_commits)
+        }
 
-        print(f"Cached {len(ctx.origin_log_lines)} lines from origin branch log")
+        print(f"Cached {len(ctx.origin_commits)} commits from origin branch log")
 
         if ctx.verify:
             print("Verification enabled - will compare logs after each batch")
@@ -603,31 +904,32 @@ def setup_verification(ctx: Context):
         sys.exit(1)
 
 
+@functools.lru_cache(maxsize=8)
 def is_lfs_enabled(workspace_dir: str) -> bool:
-    """Check if Git LFS is enabled in the repository."""
+    """Check if Git LFS is enabled in the repository (cached per workspace)."""
     try:
         # Check if .gitattributes exists and contains filter=lfs
+        # Read as bytes, the marker is ASCII so there's no need to decode the file
         gitattributes_path = os.path.join(workspace_dir, ".gitattributes")
         if os.path.exists(gitattributes_path):
-            with open(gitattributes_path, "r", encoding="utf-8", errors="replace") as f:
-                content = f.read()
-                if "filter=lfs" in content:
+            with open(gitattributes_path, "rb") as f:
+                if b"filter=lfs" in f.read():
                     return True
 
         # Also check if git lfs is installed and repo has LFS tracked files
-        result = subprocess.run(
-            ["git", "lfs", "ls-files"],
+        # Only whether there is any output matters, so read the first line and
+        # stop git lfs instead of buffering the whole file list
+        with subprocess.Popen(
+            ["git", "lfs", "ls-files", "--name-only"],
             cwd=workspace_dir,
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-        )
-        # If command succeeds and has output, LFS is likely enabled
-        if result.returncode == 0 and result.stdout.strip():
-            return True
-
-        return False
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=_GIT_READONLY_ENV,
+        ) as process:
+            has_lfs_files = bool(process.stdout.readline().strip())
+            process.kill()
+        # If command has output, LFS is likely enabled
+        return has_lfs_files
     except (subprocess.CalledProcessError, FileNotFoundError):
         # Git LFS not installed or not enabled
         return False
@@ -657,33 +959,29 @@ def find_commits_with_lfs_in_range(
             f"{start_commit}..{end_commit}",
             "-G",
             "oid sha256:",
-            "--name-only",
-            "--pretty=format:%H %s",
+            "--format=%H",
         ]
 
         output = run_command_and_get_return_info(
-            cmd, cwd=ctx.workspace_dir, shell=False
+            cmd,
+            cwd=ctx.workspace_dir,
+            shell=False,
+            env=_GIT_READONLY_ENV,
+            echo=ctx.echo_commands,
         )
 
         # Parse output to extract unique commit SHAs
-        # Format: commit_hash commit_message\nfile1\nfile2\n\ncommit_hash2...
+        # Format: one commit_hash per line, only the hashes are needed so neither
+        # subjects nor file names (--name-only) are printed and decoded
         # git log returns commits in reverse chronological order (newest first)
-        commit_shas = []
-        seen_commits = set()
-
-        for line in output.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-
-            # Check if line starts with a 40-character hex string (commit hash)
-            if len(line) >= 40:
-                # Try to extract commit hash (first 40 chars should be hex)
-                potential_hash = line[:40]
-                if all(c in "0123456789abcdefABCDEF" for c in potential_hash):
-                    if potential_hash not in seen_commits:
-                        commit_shas.append(potential_hash)
-                        seen_commits.add(potential_hash)
+        # Keep lines starting with a 40-character hex string (commit hash);
+        # dict.fromkeys drops duplicates while keeping the first-seen order
+        candidates = (
+            line[:40]
+            for line in map(str.strip, output.splitlines())
+            if len(line) >= 40 and not NON_HEX_CHAR_PATTERN.search(line, 0, 40)
+        )
+        commit_shas = list(dict.fromkeys(candidates))
 
         # Reverse to get chronological order (oldest first) for consistency
         commit_shas.reverse()
@@ -698,65 +996,126 @@ def find_commits_with_lfs_in_range(
         return []
 
 
-def fetch_lfs_objects_for_commit(ctx: Context, commit_sha: str) -> bool:
-    """Fetch Git LFS objects for a specific commit by creating a temp branch.
+def update_temp_branches(ctx: Context, updates: dict) -> bool:
+    """Create or delete local branches without a git branch call per branch.
 
-    Creates a temporary local branch at the commit, fetches LFS objects
-    for that branch, then cleans up the temporary branch.
+    Uses pygit2 when available, otherwise applies all updates in one
+    `git update-ref --stdin` transaction.
 
     Args:
         ctx: Context object
-        commit_sha: Commit SHA to fetch LFS objects for
+        updates: Branch name -> commit SHA to point it at, or None to delete it
 
     Returns:
         bool: True if successful, False on error
     """
-    temp_branch_name = f"temp_lfs_fetch_{commit_sha[:8]}"
+    repo = open_pygit2_repository(ctx.workspace_dir)
+    if repo is not None:
+        try:
+            for branch_name, commit_sha in updates.items():
+                ref_name = f"refs/heads/{branch_name}"
+                if commit_sha:
+                    repo.references.create(ref_name, commit_sha, force=True)
+                elif ref_name in repo.references:
+                    repo.references.delete(ref_name)
+            return True
+        except (pygit2.GitError, KeyError, ValueError) as e:
+            print(f"Warning: Failed to update temporary branches: {e}")
+            return False
+
+    # "update" without an old value also replaces branches left by an aborted run
+    instructions = "".join(
+        f"update refs/heads/{branch_name} {commit_sha}\n"
+        if commit_sha
+        else f"delete refs/heads/{branch_name}\n"
+        for branch_name, commit_sha in updates.items()
+    )
+    if ctx.echo_commands:
+        print(f"Running: git update-ref --stdin ({len(updates)} ref(s))")
+    result = subprocess.run(
+        ["git", "update-ref", "--stdin"],
+        input=instructions,
+        cwd=ctx.workspace_dir,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    for line in result.stderr.splitlines():
+        ctx.cmd_logger.error(line)
+    return result.returncode == 0
+
 
+def get_lfs_fetch_jobs() -> int:
+    """Get the maximum number of concurrent git lfs fetch processes.
+
+    Reads LFS_FETCH_CONCURRENCY from the environment, defaulting to
+    LFS_FETCH_JOBS. Each git lfs fetch already transfers several objects at
+    once (lfs.concurrenttransfers), so the default stays small.
+    """
+    value = os.environ.get(LFS_FETCH_CONCURRENCY_ENV, "")
     try:
-        # Create temporary branch at commit
-        result = run_command(
-            ["git", "branch", temp_branch_name, commit_sha],
-            cwd=ctx.workspace_dir,
-            logger=ctx.cmd_logger,
+        jobs = int(value) if value.strip() else LFS_FETCH_JOBS
+    except ValueError:
+        print(
+            f"Warning: Invalid {LFS_FETCH_CONCURRENCY_ENV}='{value}', using {LFS_FETCH_JOBS}"
         )
+        jobs = LFS_FETCH_JOBS
+    return max(1, jobs)
+
+
+def fetch_lfs_objects_for_commits(ctx: Context, commit_shas: list[str]) -> bool:
+    """Fetch Git LFS objects for several commits with batched git lfs fetch calls.
 
-        if result != 0:
+    Creates a temporary local branch at each commit, fetches LFS objects for
+    those branches with up to get_lfs_fetch_jobs() concurrent `git lfs fetch` calls
+    (each taking a share of the branches), then cleans up the branches.
+
+    Args:
+        ctx: Context object
+        commit_shas: Commit SHAs to fetch LFS objects for
+
+    Returns:
+        bool: True if successful, False on error
+    """
+    temp_branch_names = []
+
+    try:
+        # Create temporary branches at commits, all at once
+        temp_branches = {
+            f"temp_lfs_fetch_{commit_sha[:8]}": commit_sha for commit_sha in commit_shas
+        }
+        if not update_temp_branches(ctx, temp_branches):
             print(
-                f"Warning: Failed to create temporary branch for commit {commit_sha[:8]} (return code: {result})"
+                f"Warning: Failed to create temporary branches for {len(commit_shas)} commit(s)"
             )
             return False
+        temp_branch_names = list(temp_branches)
 
-        try:
-            # Fetch LFS objects for the temporary branch
-            lfs_result = run_command(
-                ["git", "lfs", "fetch", ctx.source_remote, temp_branch_name],
+        # Fetch LFS objects for the temporary branches, the fetches are network
+        # bound so they run concurrently. Branches are created and deleted outside
+        # the threads, concurrent ref deletions would fight over packed-refs.lock
+        jobs = min(get_lfs_fetch_jobs(), len(temp_branch_names))
+        branch_groups = [temp_branch_names[i::jobs] for i in range(jobs)]
+
+        def fetch_group(branch_names):
+            return run_command(
+                ["git", "lfs", "fetch", ctx.source_remote] + branch_names,
                 cwd=ctx.workspace_dir,
                 logger=ctx.cmd_logger,
                 stderr_to_stdout=True,
+                echo=ctx.echo_commands,
             )
 
-            if lfs_result == 0:
-                return True
-            else:
-                print(
-                    f"Warning: LFS fetch returned non-zero exit code {lfs_result} for commit {commit_sha[:8]}"
-                )
-                return False
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            lfs_results = list(executor.map(fetch_group, branch_groups))
 
-        finally:
-            # Always clean up the temporary branch
-            cleanup_result = run_command(
-                ["git", "branch", "-D", temp_branch_name],
-                cwd=ctx.workspace_dir,
-                logger=ctx.cmd_logger,
+        failed_results = [result for result in lfs_results if result != 0]
+        if failed_results:
+            print(
+                f"Warning: {len(failed_results)}/{jobs} LFS fetch(es) returned non-zero exit code {failed_results[0]}"
             )
-
-            if cleanup_result != 0:
-                # Non-fatal, just warn
-                print(
-                    f"Warning: Failed to delete temporary branch '{temp_branch_name}' (return code: {cleanup_result})"
-                )
+            return False
 
         return True
 
@@ -764,8 +1123,17 @@ def fetch_lfs_objects_for_commit(ctx: Context, commit_sha: str) -> bool:
         print("Warning: git-lfs command not found. Skipping LFS fetch.")
         return False
     except Exception as e:
-        print(f"Warning: Error fetching LFS objects for commit {commit_sha[:8]}: {e}")
+        print(f"Warning: Error fetching LFS objects: {e}")
         return False
+    finally:
+        # Always clean up the temporary branches
+        if temp_branch_names and not update_temp_branches(
+            ctx, dict.fromkeys(temp_branch_names)
+        ):
+            # Non-fatal, just warn
+            print(
+                f"Warning: Failed to delete temporary branches {', '.join(temp_branch_names)}"
+            )
 
 
 def fetch_lfs_objects_for_batch(
@@ -774,7 +1142,7 @@ def fetch_lfs_objects_for_batch(
     """Fetch Git LFS objects for all commits in a batch that contain LFS files.
 
     Finds all commits in the batch range that contain LFS files, then fetches
-    LFS objects for each of those commits individually.
+    LFS objects for all of those commits at once.
 
     Args:
         ctx: Context object
@@ -788,128 +1156,267 @@ def fetch_lfs_objects_for_batch(
     if not ctx.is_using_lfs:
         return True  # LFS not enabled, nothing to do
 
-    print(
-        f"Finding commits with LFS files in batch {batch_num} (range: {start_commit[:8]}..{end_commit[:8]})..."
+    vprint(
+        ctx,
+        2,
+        f"Finding commits with LFS files in batch {batch_num} (range: {start_commit[:8]}..{end_commit[:8]})...",
     )
 
     # Find all commits in the batch that contain LFS files
     commits_with_lfs = find_commits_with_lfs_in_range(ctx, start_commit, end_commit)
 
     if not commits_with_lfs:
-        print(f"No commits with LFS files found in batch {batch_num}")
+        vprint(ctx, 2, f"No commits with LFS files found in batch {batch_num}")
         return True
 
-    print(
-        f"Found {len(commits_with_lfs)} commit(s) with LFS files in batch {batch_num}"
+    vprint(
+        ctx,
+        2,
+        f"Found {len(commits_with_lfs)} commit(s) with LFS files in batch {batch_num}",
     )
 
-    # Fetch LFS objects for each commit
-    success_count = 0
-    for commit_sha in commits_with_lfs:
-        print(f"Fetching LFS objects for commit {commit_sha[:8]}...")
-        if fetch_lfs_objects_for_commit(ctx, commit_sha):
-            success_count += 1
-        else:
-            print(f"Warning: Failed to fetch LFS objects for commit {commit_sha[:8]}")
-            # Continue with other commits
-
-    if success_count == len(commits_with_lfs):
-        print(
-            f"LFS objects fetched successfully for all {success_count} commit(s) in batch {batch_num}"
+    vprint(ctx, 2, f"Fetching LFS objects for {len(commits_with_lfs)} commit(s)...")
+    if fetch_lfs_objects_for_commits(ctx, commits_with_lfs):
+        vprint(
+            ctx,
+            2,
+            f"LFS objects fetched successfully for all {len(commits_with_lfs)} commit(s) in batch {batch_num}",
         )
-        return True
     else:
         print(
-            f"Warning: Only {success_count}/{len(commits_with_lfs)} commits had LFS objects fetched successfully"
+            f"Warning: Failed to fetch LFS objects for some commits in batch {batch_num}"
         )
-        # Continue anyway - the push will fail if LFS objects are actually missing
-        return True
+    # Continue anyway - the push will fail if LFS objects are actually missing
+    return True
 
 
 def get_push_command(ctx: Context, target_commit: str) -> tuple:
     """Get the push command as a list and string representation."""
-    cmd = (
-        ["git", "push"]
-        + ctx.push_options
-        + [ctx.dest_remote, f"{target_commit}:refs/heads/{ctx.branch}"]
-    )
-    cmd_str = " ".join(cmd)
+    refspec = f"{target_commit}:refs/heads/{ctx.branch}"
+    cmd = ctx.push_cmd_prefix + [refspec]
+    cmd_str = f"{ctx.push_cmd_prefix_str} {refspec}"
     return cmd, cmd_str
 
 
 def push_batch(ctx: Context, target_commit: str, batch_num: int) -> bool:
-    """Push a single batch of commits."""
+    """Push a single batch of commits.
+
+    A push the server rejected for rate limiting (PUSH_RATE_LIMIT_PATTERN in
+    its output) is retried with exponential backoff.
+    """
     cmd, cmd_str = get_push_command(ctx, target_commit)
-    print(f"Executing: {cmd_str}")
-    print(
-        f"  (This updates refs/heads/{ctx.branch} to point to {target_commit} from {ctx.source_remote}/{ctx.branch})"
+    vprint(ctx, 1, f"Executing: {cmd_str}")
+    vprint(
+        ctx,
+        1,
+        f"  (This updates refs/heads/{ctx.branch} to point to {target_commit} from {ctx.source_remote}/{ctx.branch})",
     )
 
-    from run_command import OutputCaptureLogger
+    for attempt in range(PUSH_RATE_LIMIT_RETRIES + 1):
+        succeeded, output = _run_push_command(ctx, cmd)
+        if succeeded or not PUSH_RATE_LIMIT_PATTERN.search(output):
+            return succeeded
+        if attempt == PUSH_RATE_LIMIT_RETRIES:
+            break
+        delay = min(PUSH_RETRY_MAX_DELAY, 2**attempt)
+        print(
+            f"Push of batch {batch_num} was rate limited, retrying in {delay}s ({attempt + 1}/{PUSH_RATE_LIMIT_RETRIES})..."
+        )
+        time.sleep(delay)
+    return False
+
+
+def _run_push_command(ctx: Context, cmd: list) -> tuple:
+    """Run a push command, return (succeeded, last lines of its output)."""
+    from run_command import ErrorPatternLogger
 
     # Use run_command to execute and log sub-command output
     # Git push outputs to stderr, so use stderr_to_stdout=True to treat it as normal output
-    # error_regex will catch actual error messages matching REGEX_PUSH_ERROR pattern
+    # error_regex will catch actual error messages matching PUSH_ERROR_PATTERN
     try:
-        capture_logger = OutputCaptureLogger(ctx.cmd_logger)
+        # Lines are checked against PUSH_ERROR_PATTERN as they are logged
+        capture_logger = ErrorPatternLogger(ctx.cmd_logger, PUSH_ERROR_PATTERN)
         return_code = run_command(
             cmd,
             cwd=ctx.workspace_dir,
             logger=capture_logger,
             stderr_to_stdout=True,
-            error_regex=REGEX_PUSH_ERROR,
+            error_regex=PUSH_ERROR_PATTERN,
+            echo=ctx.echo_commands,
         )
 
-        # Get captured output for error checking
-        output = capture_logger.get_output()
-
         # Check if output contains error keywords matching REGEX_PUSH_ERROR pattern
-        if re.search(REGEX_PUSH_ERROR, output, re.IGNORECASE):
-            print(f"Error detected in output: found pattern '{REGEX_PUSH_ERROR}'")
-            print(f"========================================================")
-            print(f"{output}")
-            print(f"========================================================")
-            print(f"Return code: {return_code}")
-            return False
+        if capture_logger.error_seen:
+            separator = "========================================================"
+            sys.stdout.write(
+                f"Error detected in output: found pattern '{REGEX_PUSH_ERROR}'\n"
+                f"{separator}\n{capture_logger.get_output()}\n{separator}\n"
+                f"Return code: {return_code}\n"
+            )
+            return False, capture_logger.get_output()
 
         # Also check return code
-        return return_code == 0
+        return return_code == 0, capture_logger.get_output()
     except Exception as e:
         if ctx.cmd_logger:
             ctx.cmd_logger.error(f"Error executing push command: {e}")
         else:
             print(f"Error executing push command: {e}")
-        return False
+        return False, ""
+
+
+def plan_batches(ctx: Context) -> list[tuple[int, int, int]]:
+    """Split ctx.commits into batches and pick the commit each batch pushes.
+
+    The pushed (target) commit is the last commit of the batch, skipping back
+    over sub-commits of merge commits since they aren't descendants of the
+    previously pushed commit. If that leaves nothing, skip forward instead.
+
+    Returns:
+        list[tuple[int, int, int]]: (start index, end index, target index) per batch
+    """
+    # Nearest commit at or before / at or after each index that isn't a
+    # sub-commit of a merge commit (-1 / len(commits) if there is none),
+    # so picking a target doesn't rescan sub-commit runs for every batch
+    n = len(ctx.commits)
+    prev_real = [-1] * n
+    next_real = [n] * n
+    last = -1
+    for k, commit in enumerate(ctx.commits):
+        if not commit.is_sub_line_of_merge_commit:
+            last = k
+        prev_real[k] = last
+    last = n
+    for k in range(n - 1, -1, -1):
+        if not ctx.commits[k].is_sub_line_of_merge_commit:
+            last = k
+        next_real[k] = last
+
+    batches = []
+    for i in range(0, ctx.total_commits, BATCH_SIZE):
+        # Calculate end index for this batch
+        end = min(i + BATCH_SIZE - 1, ctx.total_commits - 1)
+
+        # Find target_commit, skipping sub-commits of merge commits
+        target_idx = prev_real[end]
+        skipped = list(range(end, max(target_idx, i - 1), -1))
+
+        # If we went back too far, use the first commit in the batch
+        if target_idx < i + 1:  # find next
+            target_idx = next_real[end]
+            skipped += range(end, target_idx)
+
+        if ctx.debug_mode:
+            for j in skipped:
+                print(f"Skipping sub-commit of merge commit: {ctx.commits[j]}")
+
+        batches.append((i, end, target_idx))
+    return batches
+
+
+def get_batch_range(ctx: Context, batch: tuple[int, int, int]) -> tuple[str, str]:
+    """Get the (start, end) commit range a batch pushes.
+
+    Range format: start..end means commits reachable from end but not from start.
+    """
+    i, _, target_idx = batch
+    if i == 0:
+        # First batch: use destination HEAD as start (commits before first commit to push)
+        start_commit = ctx.dest_head_hash
+    else:
+        # Subsequent batches: use the commit before the first commit in this batch
+        start_commit = ctx.commits[i - 1].hash
+    return start_commit, ctx.commits[target_idx].hash
+
+
+def merge_small_batches(
+    ctx: Context, batches: list[tuple[int, int, int]]
+) -> list[tuple[int, int, int]]:
+    """Merge consecutive batches into one push while their packs stay small.
+
+    The pack size of each batch is estimated with `git rev-list --disk-usage`
+    (git 2.31+), then batches are merged greedily as long as the combined
+    estimate stays below ctx.max_pack_bytes. A merged push is still capped at
+    BATCH_SIZE * MAX_MERGED_BATCHES commits. The batches are returned as they
+    are if merging is disabled or the estimate fails.
+    """
+    if ctx.max_pack_bytes <= 0 or len(batches) < 2:
+        return batches
+
+    vprint(ctx, 1, f"Estimating pack sizes of {len(batches)} batches...")
+    sizes = []
+    for batch in batches:
+        start_commit, target_commit = get_batch_range(ctx, batch)
+        cmd = [
+            "git",
+            "rev-list",
+            "--objects",
+            "--disk-usage",
+            target_commit,
+            f"^{start_commit}",
+        ]
+        try:
+            output = run_command_and_get_return_info(
+                cmd,
+                cwd=ctx.workspace_dir,
+                shell=False,
+                env=_GIT_READONLY_ENV,
+                echo=ctx.echo_commands,
+            )
+            sizes.append(int(output.strip()))
+        except (subprocess.CalledProcessError, ValueError) as e:
+            print(f"Warning: Failed to estimate pack sizes, batches are not merged: {e}")
+            return batches
+
+    max_merged_commits = BATCH_SIZE * MAX_MERGED_BATCHES
+    merged = []
+    merged_size = 0
+    for batch, size in zip(batches, sizes):
+        if (
+            merged
+            and merged_size + size < ctx.max_pack_bytes
+            and batch[1] - merged[-1][0] + 1 <= max_merged_commits
+        ):
+            # Extend the previous push up to this batch's target
+            merged[-1] = (merged[-1][0], batch[1], batch[2])
+            merged_size += size
+        else:
+            merged.append(batch)
+            merged_size = size
+    return merged
 
 
 def show_batch_commits(
     ctx: Context, start_idx: int, end_idx: int, batch_num: int, target_commit: str
 ):
     """Show commits in a batch for debug mode using cached commit info."""
-    print("")
-    print(f"========== DEBUG MODE: Commits in batch {batch_num} ==========")
-
     # Show the push command that will be executed
     _, cmd_str = get_push_command(ctx, target_commit)
 
-    print("========================================================")
+    # The listing is collected and written at once, it can be BATCH_SIZE lines long
+    lines = [
+        "",
+        f"========== DEBUG MODE: Commits in batch {batch_num} ==========",
+        "========================================================",
+    ]
     for j in range(start_idx, end_idx + 1):
         commit_info = ctx.commits[j]
         # Format as short hash - message (matching git log -1 --format=%h - %s)
         # short_hash = commit_info.hash[:7]
         if commit_info.is_sub_line_of_merge_commit:
-            print(
+            lines.append(
                 f"{j}. sub-commit, skipped: {commit_info.hash} - {commit_info.message}"
             )
             continue
-        print(f"{j}. {commit_info.hash} - {commit_info.message}")
-    print("========================================================")
-    print(f"Push command: {cmd_str}")
-    print(
-        f"  (This will update refs/heads/{ctx.branch} to point to {target_commit} from {ctx.source_remote}/{ctx.branch})"
-    )
-    print("========================================================")
-    print("")
+        lines.append(f"{j}. {commit_info.hash} - {commit_info.message}")
+    lines += [
+        "========================================================",
+        f"Push command: {cmd_str}",
+        f"  (This will update refs/heads/{ctx.branch} to point to {target_commit} from {ctx.source_remote}/{ctx.branch})",
+        "========================================================",
+        "",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -923,7 +1430,24 @@ def main():
     ctx.dest_remote = args.remote
     ctx.branch = args.branch
     ctx.debug_mode = args.debug
+    ctx.confirm_batches = args.debug and not args.yes
+    if args.quiet:
+        ctx.verbosity = 0
+    elif args.verbose or args.debug:
+        ctx.verbosity = 2
+    ctx.echo_commands = ctx.verbosity >= 1
+    if not ctx.echo_commands:
+        # Command output is dropped, errors are still shown
+        ctx.cmd_logger = ConsoleCommandLogger(prefix="[SUBCMD]", show_info=False)
     ctx.verify = not args.no_verify
+    ctx.deep_verify = args.deep_verify
+    ctx.throttle = args.throttle
+    if args.commit_graph:
+        ctx.commit_graph = "write"
+    elif args.no_commit_graph:
+        ctx.commit_graph = "off"
+    ctx.max_pack_bytes = int(args.max_pack_mb * 1024 * 1024)
+    ctx.fetch_source = args.fetch_source
 
     # Validate workspace directory
     validate_workspace_directory(ctx.workspace_dir)
@@ -943,27 +1467,53 @@ def main():
     print(f"Remote URL: {sanitize_remote_url(remote_url)}")
 
     # Fetch latest state from destination remote
-    print(
-        f"Fetching latest remote state from {ctx.source_remote} and {ctx.dest_remote}..."
-    )
-    # Don't automatically fetch the source remote, you need to fetch it manually or with other scripts
-    # run_command(["git", "fetch", "--force", ctx.source_remote], cwd=ctx.workspace_dir, logger=ctx.cmd_logger)
-    # git fetch outputs info to stderr, so use stderr_to_stdout=True to treat it as normal output
-    # error_regex will catch actual error messages
-    run_command(
-        ["git", "fetch", "--force", ctx.dest_remote],
-        cwd=ctx.workspace_dir,
-        logger=ctx.cmd_logger,
-        stderr_to_stdout=True,
-        error_regex=".*error.*",
-    )
+    # Don't automatically fetch the source remote, you need to fetch it manually,
+    # with other scripts or with --fetch-source (one git fetch for both remotes)
+    fetch_remotes = [ctx.dest_remote]
+    if ctx.fetch_source:
+        fetch_remotes.insert(0, ctx.source_remote)
+    print(f"Fetching latest remote state from {' and '.join(fetch_remotes)}...")
+    # The fetch is network bound, the source branch and LFS checks don't depend
+    # on it and run meanwhile. The destination branch is checked once it is done
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # git fetch outputs info to stderr, so use stderr_to_stdout=True to treat it as normal output
+        # error_regex will catch actual error messages
+        fetch_future = executor.submit(
+            run_command,
+            ["git", "fetch", "--multiple", "--force", *fetch_remotes],
+            cwd=ctx.workspace_dir,
+            logger=ctx.cmd_logger,
+            stderr_to_stdout=True,
+            error_regex=FETCH_ERROR_PATTERN,
+            echo=ctx.echo_commands,
+        )
+
+        # Ref lookups of the whole sync share one cat-file process
+        try:
+            ctx.ref_resolver = RefResolver(ctx.workspace_dir, env=_GIT_READONLY_ENV)
+        except OSError as e:
+            # Lookups fall back to one-shot processes, which report the error
+            print(f"Warning: Failed to start git cat-file: {e}")
+
+        if ctx.fetch_source:
+            # The source branch can only be checked once it is fetched
+            fetch_future.result()
+
+        # Validate source branch exists
+        ctx.source_head_hash = validate_branch_exists(
+            ctx.workspace_dir, ctx.source_remote, ctx.branch, ctx.ref_resolver
+        )
+
+        # Check if LFS is enabled and store in context
+        ctx.is_using_lfs = is_lfs_enabled(ctx.workspace_dir)
 
-    # Validate branches exist
-    validate_branch_exists(ctx.workspace_dir, ctx.source_remote, ctx.branch)
-    validate_branch_exists(ctx.workspace_dir, ctx.dest_remote, ctx.branch)
+        fetch_future.result()
+
+    # Validate destination branch exists, its HEAD is where the sync starts from
+    ctx.dest_head_hash = validate_branch_exists(
+        ctx.workspace_dir, ctx.dest_remote, ctx.branch, ctx.ref_resolver
+    )
 
-    # Check if LFS is enabled and store in context
-    ctx.is_using_lfs = is_lfs_enabled(ctx.workspace_dir)
     if ctx.is_using_lfs:
         print("Git LFS detected - will fetch LFS objects for each batch before pushing")
     else:
@@ -992,53 +1542,53 @@ def main():
     else:
         ctx.push_options = []
         print("Using safe push (will fail on conflicts)")
+    ctx.push_cmd_prefix = ["git", "push", *ctx.push_options, ctx.dest_remote]
+    ctx.push_cmd_prefix_str = " ".join(ctx.push_cmd_prefix)
 
     # Verify logs before starting batch pushes
     if ctx.verify:
         print("Verifying initial state before batch pushes...")
-        if not verify_logs(ctx):
+        # A destination HEAD found in the origin log only has to be unchanged
+        initial_head = None
+        if ctx.dest_head_hash in ctx.origin_hash_to_idx:
+            initial_head = ctx.dest_head_hash
+        if not verify_logs(ctx, initial_head):
             print("Initial verification failed. Exiting.")
             sys.exit(1)
 
-    # Push commits in batches
-    for i in range(0, ctx.total_commits, BATCH_SIZE):
-        # Calculate end index for this batch
-        end = min(i + BATCH_SIZE - 1, ctx.total_commits - 1)
+    batches = merge_small_batches(ctx, plan_batches(ctx))
+    if len(batches) != ctx.total_batches:
+        print(
+            f"Merged small batches: pushing in {len(batches)} batches instead of {ctx.total_batches}"
+        )
+        ctx.total_batches = len(batches)
+
+    # LFS objects of the next batch are downloaded while the current batch is
+    # pushed. Not when every batch waits for confirmation first
+    lfs_executor = None
+    if ctx.is_using_lfs and not ctx.confirm_batches:
+        lfs_executor = ThreadPoolExecutor(max_workers=1)
+        lfs_future = lfs_executor.submit(
+            fetch_lfs_objects_for_batch, ctx, *get_batch_range(ctx, batches[0]), 1
+        )
 
+    # Push commits in batches, each batch pushes its target commit by hash
+    for batch_num, (i, end, target_idx) in enumerate(batches, start=1):
         # Get the commit hashes for the start and end of this batch
         first_commit = ctx.commits[i].hash
-
-        # Find target_commit, skipping sub-commits of merge commits
-        target_idx = end
-        while target_idx >= i and ctx.commits[target_idx].is_sub_line_of_merge_commit:
-            if ctx.debug_mode:
-                print(f"Skipping sub-commit of merge commit: {ctx.commits[target_idx]}")
-            target_idx -= 1
-
-        # If we went back too far, use the first commit in the batch
-        if target_idx < i + 1:  # find next
-            target_idx = end
-            while (
-                target_idx < len(ctx.commits)
-                and ctx.commits[target_idx].is_sub_line_of_merge_commit
-            ):
-                if ctx.debug_mode:
-                    print(
-                        f"Skipping sub-commit of merge commit: {ctx.commits[target_idx]}"
-                    )
-                target_idx += 1
-
         target_commit = ctx.commits[target_idx].hash
-        batch_num = (i // BATCH_SIZE) + 1
 
-        print(
-            f"Pushing batch {batch_num}/{ctx.total_batches}: commits {i+1} to {end+1}"
+        vprint(
+            ctx,
+            1,
+            f"Pushing batch {batch_num}/{ctx.total_batches}: commits {i+1} to {end+1}",
         )
-        print(f"  Range: {first_commit} (first) -> {target_commit} (last)")
+        vprint(ctx, 1, f"  Range: {first_commit} (first) -> {target_commit} (last)")
 
         # Debug mode: list commits in this batch and ask for confirmation
         if ctx.debug_mode:
             show_batch_commits(ctx, i, target_idx, batch_num, target_commit)
+        if ctx.confirm_batches:
             batch_confirmation = input(
                 f"Do you want to proceed with pushing batch {batch_num}? [yes/no]: "
             )
@@ -1048,36 +1598,30 @@ def main():
             print("")
 
         # Fetch LFS objects for this batch if LFS is enabled
-        if ctx.is_using_lfs:
-            # Determine start commit for git log range
-            # Range format: start..end means commits reachable from end but not from start
-            if i == 0:
-                # First batch: use destination HEAD as start (commits before first commit to push)
-                start_commit = ctx.dest_head_hash
-            else:
-                # Subsequent batches: use the commit before the first commit in this batch
-                start_commit = ctx.commits[i - 1].hash
-
-            fetch_lfs_objects_for_batch(ctx, start_commit, target_commit, batch_num)
+        if lfs_executor is not None:
+            # Wait for this batch's prefetch, then start the next batch's
+            lfs_future.result()
+            if batch_num < len(batches):
+                lfs_future = lfs_executor.submit(
+                    fetch_lfs_objects_for_batch,
+                    ctx,
+                    *get_batch_range(ctx, batches[batch_num]),
+                    batch_num + 1,
+                )
+        elif ctx.is_using_lfs:
+            fetch_lfs_objects_for_batch(
+                ctx, *get_batch_range(ctx, batches[batch_num - 1]), batch_num
+            )
 
         # Push this batch
         if push_batch(ctx, target_commit, batch_num):
             print(f"[SUCCEEDED] Batch {batch_num} pushed successfully")
 
-            # Fetch from destination remote to get the newest pushed result
-            print(f"Fetching from {ctx.dest_remote} to update local references...")
-            # git fetch outputs info to stderr, so use stderr_to_stdout=True to treat it as normal output
-            # error_regex will catch actual error messages
-            run_command(
-                ["git", "fetch", "--force", ctx.dest_remote, ctx.branch],
-                cwd=ctx.workspace_dir,
-                logger=ctx.cmd_logger,
-                stderr_to_stdout=True,
-                error_regex=".*error.*",
-            )
+            # No fetch needed here: the push already updated the local
+            # remote-tracking ref, and verify_logs fetches the destination itself
 
             # Verification: compare logs after each batch
-            if not verify_logs(ctx):
+            if not verify_logs(ctx, target_commit):
                 sys.exit(1)
         else:
             print(f"[FAILED] Failed to push batch {batch_num}")
@@ -1100,8 +1644,14 @@ def main():
                 )
             sys.exit(1)
 
-        # Small delay to be nice to the server
-        time.sleep(1)
+        # Optional delay to be nice to the server, not needed after the last batch
+        if ctx.throttle > 0 and batch_num < len(batches):
+            time.sleep(ctx.throttle)
+
+    if lfs_executor is not None:
+        lfs_executor.shutdown()
+    if ctx.ref_resolver is not None:
+        ctx.ref_resolver.close()
 
     print("[SUCCEEDED] All commits pushed successfully!")
 
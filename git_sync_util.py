@@ -6,8 +6,17 @@ This module contains utility functions for git sync operations.
 """
 
 import re
+import subprocess
+from typing import Optional
 from urllib.parse import urlparse, urlunparse, ParseResult
 
+# Optional: with pygit2 (libgit2 bindings) installed, the scripts read and update
+# local refs and history in-process. Network operations always use git.
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
 
 def sanitize_remote_url(url: str) -> str:
     """Sanitize remote URL by masking authentication tokens.
@@ -111,4 +120,72 @@ def deep_merge(target, source):
         else:
             # Otherwise (key does not exist, or one of the values is not a dictionary), overwrite/add
             target[key] = value
-    return target
\ No newline at end of file
+    return target
+
+
+class RefResolver:
+    """Resolve refs to commit hashes through one long-lived `git cat-file` process.
+
+    Each lookup is a line written to `git cat-file --batch-check` and a line read
+    back, instead of starting a new git process per ref.
+
+    Usage:
+        with RefResolver(workspace_dir) as resolver:
+            commit_hash = resolver.resolve("refs/remotes/origin/master")
+    """
+
+    def __init__(self, workspace_dir: str, env: Optional[dict] = None):
+        """
+        Start the cat-file process.
+
+        :param workspace_dir: Path to the git repository
+        :param env: Optional environment for git (default: inherit)
+        """
+        self.process = subprocess.Popen(
+            ["git", "cat-file", "--batch-check=%(objectname)"],
+            cwd=workspace_dir,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+
+    def resolve(self, ref: str) -> Optional[str]:
+        """Get the object hash of a ref, or None if it doesn't exist."""
+        self.process.stdin.write(ref + "\n")
+        self.process.stdin.flush()
+        answer = self.process.stdout.readline().strip()
+        # Unknown refs are answered with "<ref> missing" (or "<ref> ambiguous")
+        if not answer or " " in answer:
+            return None
+        return answer
+
+    def close(self):
+        """Stop the cat-file process."""
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+        self.process.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_pygit2_repository(workspace_dir: str):
+    """Open the repository with pygit2.
+
+    Returns:
+        pygit2.Repository, or None if pygit2 is not installed or the directory
+        is not a repository it can open
+    """
+    if pygit2 is None:
+        return None
+    try:
+        return pygit2.Repository(workspace_dir)
+    except (pygit2.GitError, KeyError, ValueError):
+        return None
@@ -29,12 +29,7 @@ from pathlib import Path
 
 # Import run_command from the external module
 # sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "unreal_build_script"))
-from run_command import run_command
-
-# Import OutputCaptureLogger from local run_command module (same directory)
-# Temporarily remove the sys.path entry to import from local module
-# sys.path.pop(0)
-from run_command import OutputCaptureLogger
+from run_command import run_command, run_command_and_get_return_info
 
 # sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "unreal_build_script"))
 
@@ -84,6 +79,19 @@ def hint(ui_callback, level, message):
                 print(message)
 
 
+def get_command_output(cmd, repo_path):
+    """Run a command and return (return code, output) without logging the output.
+
+    Returns -1 as the return code when the command could not be started.
+    """
+    try:
+        return 0, run_command_and_get_return_info(cmd, cwd=repo_path, shell=False)
+    except subprocess.CalledProcessError as e:
+        return e.returncode, e.output or ""
+    except OSError:
+        return -1, ""
+
+
 def ask_yesno(ui_callback, message):
     """
     Unified method to ask a yes/no question.
@@ -138,7 +146,7 @@ def init_bare_repository(repo_path, ui_callback=None):
         return True
 
     # Initialize bare repository
-    result = run_command("git init --bare", cwd=repo_path)
+    result = run_command(["git", "init", "--bare"], cwd=repo_path)
 
     if result == 0:
         hint(ui_callback, "success", f"Bare repository initialized at {repo_path}")
@@ -168,13 +176,12 @@ def configure_remote(repo_path, remote_name, remote_url, ui_callback=None):
     )
 
     # Check if remote already exists
-    capture_logger = OutputCaptureLogger(None)
-    result = run_command(
-        f"git remote get-url {remote_name}", cwd=repo_path, logger=capture_logger
+    result, output = get_command_output(
+        ["git", "remote", "get-url", remote_name], repo_path
     )
 
     if result == 0:
-        existing_url = capture_logger.get_output().strip()
+        existing_url = output.strip()
         warning_msg = f"Remote '{remote_name}' already exists with URL: {sanitize_remote_url(existing_url)}"
         hint(ui_callback, "warning", warning_msg)
 
@@ -188,7 +195,7 @@ def configure_remote(repo_path, remote_name, remote_url, ui_callback=None):
                 f"Updating remote URL to: {sanitize_remote_url(remote_url)}",
             )
             result = run_command(
-                f"git remote set-url {remote_name} {remote_url}",
+                ["git", "remote", "set-url", remote_name, remote_url],
                 cwd=repo_path,
             )
             if result == 0:
@@ -199,7 +206,9 @@ def configure_remote(repo_path, remote_name, remote_url, ui_callback=None):
                 return False
 
     # Add new remote
-    result = run_command(f"git remote add {remote_name} {remote_url}", cwd=repo_path)
+    result = run_command(
+        ["git", "remote", "add", remote_name, remote_url], cwd=repo_path
+    )
 
     if result == 0:
         hint(ui_callback, "success", f"Remote '{remote_name}' added successfully")
@@ -238,11 +247,11 @@ def configure_branch_fetch(
 
         if i == 0 and replace_first:
             # First branch: use 'git config' to replace default refspec
-            cmd = f'git config remote.{remote_name}.fetch "{refspec}"'
+            cmd = ["git", "config", f"remote.{remote_name}.fetch", refspec]
             action = "Setting"
         else:
             # Subsequent branches: use 'git config --add' to add additional refspecs
-            cmd = f'git config --add remote.{remote_name}.fetch "{refspec}"'
+            cmd = ["git", "config", "--add", f"remote.{remote_name}.fetch", refspec]
             action = "Adding"
 
         hint(ui_callback, "info", f"{action} refspec for branch '{branch}': {refspec}")
@@ -275,7 +284,7 @@ def fetch_from_remote(repo_path, remote_name, ui_callback=None):
         f"\n{'='*80}\nFetching from remote: {remote_name}\n{'='*80}\n",
     )
 
-    result = run_command(f"git fetch {remote_name}", cwd=repo_path)
+    result = run_command(["git", "fetch", remote_name], cwd=repo_path)
 
     if result == 0:
         hint(ui_callback, "success", f"Successfully fetched from '{remote_name}'")
@@ -302,15 +311,12 @@ def verify_configuration(
 
     # Check remote configuration
     hint(ui_callback, "info", f"Remote Configuration for '{remote_name}':")
-    capture_logger = OutputCaptureLogger(None)
-    result = run_command(
-        f"git config --get-all remote.{remote_name}.fetch",
-        cwd=repo_path,
-        logger=capture_logger,
+    result, output = get_command_output(
+        ["git", "config", "--get-all", f"remote.{remote_name}.fetch"], repo_path
     )
 
     if result == 0:
-        output = capture_logger.get_output().strip()
+        output = output.strip()
         configured_refspecs = output.split("\n") if output else []
         hint(
             ui_callback, "success", f"Configured refspecs ({len(configured_refspecs)}):"
@@ -327,14 +333,11 @@ def verify_configuration(
             "info",
             f"\nDestination Remote Configuration for '{destination_remote_name}':",
         )
-        capture_logger = OutputCaptureLogger(None)
-        result = run_command(
-            f"git remote get-url {destination_remote_name}",
-            cwd=repo_path,
-            logger=capture_logger,
+        result, output = get_command_output(
+            ["git", "remote", "get-url", destination_remote_name], repo_path
         )
         if result == 0:
-            dest_url = capture_logger.get_output().strip()
+            dest_url = output.strip()
             hint(
                 ui_callback,
                 "success",
@@ -349,11 +352,10 @@ def verify_configuration(
 
     # Check available branches
     hint(ui_callback, "info", f"\nAvailable Branches:")
-    capture_logger = OutputCaptureLogger(None)
-    result = run_command("git branch -a", cwd=repo_path, logger=capture_logger)
+    result, output = get_command_output(["git", "branch", "-a"], repo_path)
 
     if result == 0:
-        output = capture_logger.get_output().strip()
+        output = output.strip()
         if output:
             available_branches = [
                 line.strip().replace("* ", "").replace("remotes/", "")
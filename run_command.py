@@ -11,8 +11,16 @@ History:
     2021/06/07, create file.
     2024/12/19, fixed naming conventions and Python 3 compatibility.
     2024/12/19, added new _run_command using modern subprocess.run approach.
+    2026/10/14, added run_command_and_iter_lines and env parameters.
+    2026/10/14, console output is written one line per call for threaded callers.
+    2026/10/14, error_regex accepts precompiled patterns.
+    2026/10/14, run_command accepts an env parameter.
+    2026/10/14, added ErrorPatternLogger.
+    2026/10/14, added echo parameters and ConsoleCommandLogger show_info.
+    2026/10/14, removed OutputCaptureLogger, replaced by ErrorPatternLogger.
 ----------------------------------------------------------------------------"""
 
+import collections
 import subprocess
 import sys
 
@@ -20,45 +28,62 @@ import sys
 class ConsoleCommandLogger:
     """Simple logger for command output that writes to console with clear separation."""
 
-    def __init__(self, prefix="[CMD]"):
+    def __init__(self, prefix="[CMD]", show_info=True):
         """
         Initialize console logger.
 
         :param prefix: Prefix to use for separating command logs from main process logs
+        :param show_info: If False, only error messages are written
         """
         self.prefix = prefix
+        self.show_info = show_info
 
     def info(self, message):
         """Log info message to console."""
-        print(f"{self.prefix} {message}")
+        if not self.show_info:
+            return
+        # Single write per message, so output of concurrent callers doesn't interleave
+        print(f"{self.prefix} {message}\n", end="")
 
     def error(self, message):
         """Log error message to console."""
-        print(f"{self.prefix} ERROR: {message}")
+        print(f"{self.prefix} ERROR: {message}\n", end="")
 
 
-# Inline logger class that captures output for regex error checking
-# while forwarding logs to the original logger
-class OutputCaptureLogger:
-    def __init__(self, original_logger):
+# Logger that checks each line against an error pattern as it is logged,
+# keeping only the last lines instead of the whole output
+class ErrorPatternLogger:
+    def __init__(self, original_logger, error_pattern, max_lines=50):
+        """
+        :param original_logger: Logger to forward messages to, or None
+        :param error_pattern: Compiled regex, error_seen is set on the first match
+        :param max_lines: Number of most recent lines kept for get_output
+        """
         self.original_logger = original_logger
-        self.captured_output = []
+        self.error_pattern = error_pattern
+        self.error_seen = False
+        self.recent_output = collections.deque(maxlen=max_lines)
+
+    def _check(self, message):
+        self.recent_output.append(message)
+        if not self.error_seen and self.error_pattern.search(message):
+            self.error_seen = True
 
     def info(self, message):
-        """Capture and forward info messages."""
-        self.captured_output.append(message)
+        """Check and forward info messages."""
+        self._check(message)
         if self.original_logger:
             self.original_logger.info(message)
 
     def error(self, message):
-        """Capture and forward error messages."""
-        self.captured_output.append(message)
+        """Check and forward error messages."""
+        self._check(message)
         if self.original_logger:
             self.original_logger.error(message)
 
     def get_output(self):
-        """Get all captured output as a single string."""
-        return "\n".join(self.captured_output)
+        """Get the most recent lines as a single string."""
+        return "\n".join(self.recent_output)
 
 
 def _run_command_deprecated(cmd, cwd=None, logger=None, shell=False, timeout=300):
@@ -127,6 +152,8 @@ def _run_command(
     timeout=300,
     stderr_to_stdout=False,
     error_regex=None,
+    env=None,
+    echo=True,
 ):
     """Modern command execution using subprocess.run with automatic text handling.
 
@@ -134,14 +161,18 @@ def _run_command(
     text encoding without manual decode/encode operations.
 
     :param stderr_to_stdout: If True, treat stderr as stdout (merge streams)
-    :param error_regex: Optional regex pattern to detect error lines (case-insensitive)
+    :param error_regex: Optional regex pattern to detect error lines (case-insensitive),
+        or an already compiled pattern which is used as is
+    :param env: Optional environment for the command (default: inherit)
+    :param echo: If False, don't print the command, working directory and return code
     """
     import re
 
     try:
-        print(f"Running: {cmd if isinstance(cmd, str) else ' '.join(cmd)}")
-        if cwd:
-            print(f"  Working directory: {cwd}")
+        if echo:
+            print(f"Running: {cmd if isinstance(cmd, str) else ' '.join(cmd)}\n", end="")
+            if cwd:
+                print(f"  Working directory: {cwd}\n", end="")
 
         # Use subprocess.run with text=True for automatic text handling
         result = subprocess.run(
@@ -153,11 +184,14 @@ def _run_command(
             encoding="utf-8",
             errors="replace",
             timeout=timeout,
+            env=env,
         )
 
-        # Compile error regex if provided
+        # Compile error regex if provided (callers can pass a precompiled pattern)
         error_pattern = None
-        if error_regex:
+        if isinstance(error_regex, re.Pattern):
+            error_pattern = error_regex
+        elif error_regex:
             error_pattern = re.compile(error_regex, re.IGNORECASE)
 
         # Process stdout
@@ -201,7 +235,8 @@ def _run_command(
                         else:
                             print(f"  | ERROR: {line.strip()}")
 
-        print(f"Command completed with return code: {result.returncode}")
+        if echo:
+            print(f"Command completed with return code: {result.returncode}\n", end="")
         if logger:
             logger.info("Return: " + str(result.returncode))
 
@@ -239,6 +274,8 @@ def run_command(
     timeout=300,
     stderr_to_stdout=False,
     error_regex=None,
+    env=None,
+    echo=True,
 ):
     """Run a command with real-time output.
 
@@ -248,12 +285,15 @@ def run_command(
     :param shell: Whether to use shell
     :param timeout: Timeout in seconds
     :param stderr_to_stdout: If True, treat stderr as stdout (merge streams)
-    :param error_regex: Optional regex pattern to detect error lines (case-insensitive)
+    :param error_regex: Optional regex pattern to detect error lines (case-insensitive),
+        or an already compiled pattern which is used as is
+    :param env: Optional environment for the command (default: inherit)
+    :param echo: If False, don't print the command, working directory and return code
     :return: Return what the command return
     """
     try:
         return _run_command(
-            cmd, cwd, logger, shell, timeout, stderr_to_stdout, error_regex
+            cmd, cwd, logger, shell, timeout, stderr_to_stdout, error_regex, env, echo
         )
     except Exception as e:
         if logger:
@@ -312,10 +352,16 @@ def run_detached_command(command):
 
 
 def run_command_and_get_return_info(
-    command, cwd=None, shell=True, encoding="utf-8", timeout=300
+    command, cwd=None, shell=True, encoding="utf-8", timeout=300, env=None, echo=True
 ):
-    """Run command and return output info."""
-    print("run_command_and_get_return_info: {}".format(command))
+    """Run command and return output info.
+
+    :param env: Optional environment for the command (default: inherit)
+    :param echo: If False, don't print the command before running it
+    """
+    if echo:
+        # Single write per message, so output of concurrent callers doesn't interleave
+        print("run_command_and_get_return_info: {}\n".format(command), end="")
     try:
         return_info = subprocess.check_output(
             command,
@@ -325,6 +371,7 @@ def run_command_and_get_return_info(
             encoding=encoding,
             cwd=cwd,
             errors="replace",
+            env=env,
         )
         return return_info
     except subprocess.CalledProcessError as e:
@@ -333,3 +380,63 @@ def run_command_and_get_return_info(
     except subprocess.TimeoutExpired:
         print(f"Command timed out after {timeout} seconds")
         raise
+
+
+def run_command_and_iter_lines(
+    command, cwd=None, shell=False, encoding="utf-8", timeout=300, env=None, echo=True
+):
+    """Run command and yield its stdout line by line while it is running.
+
+    Unlike run_command_and_get_return_info, the output is never buffered as a
+    whole, so callers can parse lines as soon as the command writes them.
+
+    :param command: See subprocess.Popen, can be a single string or a list
+    :param timeout: Timeout in seconds, the process is killed when it expires
+    :param env: Optional environment for the command (default: inherit)
+    :param echo: If False, don't print the command before running it
+    :return: Generator of lines without the trailing newline
+    :raise subprocess.CalledProcessError: If the command returns non-zero
+    :raise subprocess.TimeoutExpired: If the command timed out
+    """
+    import threading
+
+    if echo:
+        # Single write per message, so output of concurrent callers doesn't interleave
+        print("run_command_and_iter_lines: {}\n".format(command), end="")
+    p = subprocess.Popen(
+        command,
+        shell=shell,
+        stdout=subprocess.PIPE,
+        cwd=cwd,
+        text=True,
+        encoding=encoding,
+        errors="replace",
+        env=env,
+    )
+    timed_out = threading.Event()
+
+    def kill_on_timeout():
+        timed_out.set()
+        p.kill()
+
+    timer = threading.Timer(timeout, kill_on_timeout)
+    timer.daemon = True
+    timer.start()
+    try:
+        for line in p.stdout:
+            yield line.rstrip("\r\n")
+        return_code = p.wait()
+    finally:
+        timer.cancel()
+        if p.poll() is None:
+            # Consumer stopped early, don't leave the process behind
+            p.kill()
+            p.wait()
+        p.stdout.close()
+
+    if timed_out.is_set():
+        print(f"Command timed out after {timeout} seconds")
+        raise subprocess.TimeoutExpired(command, timeout)
+    if return_code != 0:
+        print(f"Command failed with return code {return_code}")
+        raise subprocess.CalledProcessError(return_code, command)
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for check_remote_change module.
+
+Run with: python -m pytest test_check_remote_change.py
+Or: python test_check_remote_change.py
+"""
+
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import check_remote_change
+from check_remote_change import (
+    BRANCH_CACHE_FILE_NAME,
+    get_all_branch_hashes_two_remotes,
+    get_all_heads_by_remote,
+    get_all_remote_heads,
+    get_local_branches,
+)
+from git_sync_util import pygit2
+
+
+class RemoteRepositoryTestCase(unittest.TestCase):
+    """Base class for tests with a workspace clone of a bare remote repository.
+
+    The remote has the branches "main" and "feature/a". The workspace is a clone
+    of it, with the remote named "origin". A second clone is used to push to the
+    remote without touching the refs of the workspace.
+    """
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+        self.env = {
+            **os.environ,
+            "GIT_AUTHOR_NAME": "test",
+            "GIT_AUTHOR_EMAIL": "test@example.com",
+            "GIT_COMMITTER_NAME": "test",
+            "GIT_COMMITTER_EMAIL": "test@example.com",
+            "GIT_CONFIG_NOSYSTEM": "1",
+            "HOME": self.temp_dir,
+        }
+        self.remote_dir = os.path.join(self.temp_dir, "remote.git")
+        self.pusher_dir = os.path.join(self.temp_dir, "pusher")
+        self.workspace_dir = os.path.join(self.temp_dir, "workspace")
+        self.git(self.temp_dir, "init", "-q", "--bare", "-b", "main", self.remote_dir)
+        self.git(self.temp_dir, "clone", "-q", self.remote_dir, self.pusher_dir)
+        self.git(self.pusher_dir, "checkout", "-q", "-b", "main")
+        self.push_commit("main", "first")
+        self.push_commit("feature/a", "feature")
+        self.git(self.temp_dir, "clone", "-q", self.remote_dir, self.workspace_dir)
+
+        # The functions print the commands they run
+        patcher = mock.patch("sys.stdout", new_callable=io.StringIO)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def git(self, cwd, *args):
+        result = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            env=self.env,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return result.stdout
+
+    def push_commit(self, branch, message):
+        """Commit on top of branch in the pushing clone and push it, return the hash."""
+        self.git(self.pusher_dir, "checkout", "-q", "-B", branch)
+        self.git(self.pusher_dir, "commit", "-q", "--allow-empty", "-m", message)
+        self.git(self.pusher_dir, "push", "-q", "origin", f"HEAD:refs/heads/{branch}")
+        return self.git(self.pusher_dir, "rev-parse", "HEAD").strip()
+
+    def remote_hash(self, branch):
+        return self.git(self.remote_dir, "rev-parse", f"refs/heads/{branch}").strip()
+
+
+class TestBranchCache(RemoteRepositoryTestCase):
+    """Test cases for the branch hash cache of get_all_remote_heads."""
+
+    def test_disabled_by_default(self):
+        """Test that nothing is cached without a cache_ttl."""
+        get_all_remote_heads(self.workspace_dir, "origin")
+        old_main = self.remote_hash("main")
+        new_main = self.push_commit("main", "second")
+        self.assertNotEqual(old_main, new_main)
+        heads = get_all_remote_heads(self.workspace_dir, "origin")
+        self.assertEqual(heads["main"], new_main)
+        cache_file = os.path.join(self.workspace_dir, ".git", BRANCH_CACHE_FILE_NAME)
+        self.assertFalse(os.path.exists(cache_file))
+
+    def test_cache_hit(self):
+        """Test that the cached heads are returned while the local refs are unchanged."""
+        heads = get_all_remote_heads(self.workspace_dir, "origin", cache_ttl=3600)
+        expected = {
+            "feature/a": self.remote_hash("feature/a"),
+            "main": self.remote_hash("main"),
+        }
+        self.assertEqual(heads, expected)
+        # A push from another clone doesn't touch the local refs, the cache is used
+        self.push_commit("main", "second")
+        with mock.patch.object(
+            check_remote_change, "run_command_and_iter_lines"
+        ) as iter_lines:
+            cached = get_all_remote_heads(self.workspace_dir, "origin", cache_ttl=3600)
+        iter_lines.assert_not_called()
+        self.assertEqual(cached, heads)
+
+    def test_fetch_invalidates(self):
+        """Test that a fetch updating a loose ref, even in a subdirectory, is a miss."""
+        get_all_remote_heads(self.workspace_dir, "origin", cache_ttl=3600)
+        # The clone packed its refs, the first update of a branch writes a new
+        # loose ref and the second one replaces it
+        for branch in ("main", "feature/a", "main", "feature/a"):
+            with self.subTest(branch=branch):
+                new_hash = self.push_commit(branch, f"update {branch}")
+                self.git(self.workspace_dir, "fetch", "-q", "origin")
+                heads = get_all_remote_heads(
+                    self.workspace_dir, "origin", cache_ttl=3600
+                )
+                self.assertEqual(heads[branch], new_hash)
+
+    def test_packed_refs_invalidates(self):
+        """Test that rewriting packed-refs is a miss."""
+        get_all_remote_heads(self.workspace_dir, "origin", cache_ttl=3600)
+        new_main = self.push_commit("main", "second")
+        self.git(self.workspace_dir, "fetch", "-q", "origin")
+        self.git(self.workspace_dir, "pack-refs", "--all")
+        heads = get_all_remote_heads(self.workspace_dir, "origin", cache_ttl=3600)
+        self.assertEqual(heads["main"], new_main)
+
+    def test_ttl_expired(self):
+        """Test that a cached result older than cache_ttl is a miss."""
+        get_all_remote_heads(self.workspace_dir, "origin", cache_ttl=60)
+        new_main = self.push_commit("main", "second")
+        with mock.patch.object(
+            check_remote_change.time, "time", return_value=time.time() + 61
+        ):
+            heads = get_all_remote_heads(self.workspace_dir, "origin", cache_ttl=60)
+        self.assertEqual(heads["main"], new_main)
+
+    def test_limit_is_part_of_key(self):
+        """Test that a result cached for one branch filter isn't used for another."""
+        limited = get_all_remote_heads(
+            self.workspace_dir,
+            "origin",
+            cache_ttl=3600,
+            limit_branches=frozenset({"main"}),
+        )
+        self.assertEqual(list(limited), ["main"])
+        heads = get_all_remote_heads(self.workspace_dir, "origin", cache_ttl=3600)
+        self.assertEqual(sorted(heads), ["feature/a", "main"])
+
+    def test_failure_not_cached(self):
+        """Test that a failed ls-remote is not cached."""
+        with mock.patch.object(
+            check_remote_change,
+            "run_command_and_iter_lines",
+            side_effect=subprocess.CalledProcessError(128, "git ls-remote"),
+        ):
+            heads = get_all_remote_heads(self.workspace_dir, "origin", cache_ttl=3600)
+        self.assertEqual(heads, {})
+        cache_file = os.path.join(self.workspace_dir, ".git", BRANCH_CACHE_FILE_NAME)
+        self.assertFalse(os.path.exists(cache_file))
+
+    def test_concurrent_remotes(self):
+        """Test that remotes queried concurrently all end up in the cache file."""
+        self.git(self.workspace_dir, "remote", "add", "mirror", self.remote_dir)
+        heads_by_remote = get_all_heads_by_remote(
+            self.workspace_dir, ["origin", "mirror", "origin"], cache_ttl=3600
+        )
+        self.assertEqual(list(heads_by_remote), ["origin", "mirror"])
+        self.assertEqual(heads_by_remote["origin"], heads_by_remote["mirror"])
+        cache_file = os.path.join(self.workspace_dir, ".git", BRANCH_CACHE_FILE_NAME)
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        self.assertEqual(sorted(cache), ["mirror", "origin"])
+
+
+class TestLimitBranches(RemoteRepositoryTestCase):
+    """Test cases for passing the branch filter to git."""
+
+    # Git matches more than the exact names: for-each-ref matches "feature" against
+    # "feature/a", ls-remote matches "main" against "x/refs/heads/main" (the
+    # tail of the ref name), only exact names must be returned
+    BRANCHES = ["feature/a", "feature/main", "main", "main-2", "x/refs/heads/main"]
+
+    def setUp(self):
+        super().setUp()
+        self.push_commit("feature/main", "feature main")
+        self.push_commit("main-2", "main 2")
+        self.push_commit("x/refs/heads/main", "tail match")
+        self.git(self.workspace_dir, "fetch", "-q", "origin")
+        get_local_branches.cache_clear()
+        self.addCleanup(get_local_branches.cache_clear)
+
+    def expected(self, *branches):
+        return {branch: self.remote_hash(branch) for branch in branches}
+
+    def check_limits(self, get_heads):
+        """Check get_heads(limit_branches) for exact and pattern-like filters."""
+        self.assertEqual(get_heads(None), self.expected(*self.BRANCHES))
+        for limit, expected in (
+            ({"main"}, ["main"]),
+            ({"main", "feature/a", "missing"}, ["feature/a", "main"]),
+            ({"feature"}, []),
+            ({"a"}, []),
+            ({"feature/main"}, ["feature/main"]),
+        ):
+            with self.subTest(limit=limit):
+                heads = get_heads(frozenset(limit))
+                self.assertEqual(heads, self.expected(*expected))
+
+    def test_remote_heads(self):
+        """Test that ls-remote returns only the exactly named branches."""
+        self.check_limits(
+            lambda limit: get_all_remote_heads(
+                self.workspace_dir, "origin", limit_branches=limit
+            )
+        )
+
+    def test_local_branches(self):
+        """Test that local tracking branches are limited to the exact names."""
+        self.check_limits(
+            lambda limit: get_local_branches(self.workspace_dir, "origin", limit)
+        )
+
+    def test_local_branches_for_each_ref(self):
+        """Test the for-each-ref listing (used without pygit2) with the filters."""
+        with mock.patch.object(
+            check_remote_change, "open_pygit2_repository", return_value=None
+        ):
+            self.check_limits(
+                lambda limit: get_local_branches(self.workspace_dir, "origin", limit)
+            )
+
+    def test_two_remotes_prebuilt_heads(self):
+        """Test that unfiltered prebuilt heads are filtered by limit_branches."""
+        heads = get_all_remote_heads(self.workspace_dir, "origin")
+        branch_hashes = get_all_branch_hashes_two_remotes(
+            self.workspace_dir,
+            "origin",
+            "mirror",
+            limit_branches=frozenset({"main", "feature"}),
+            heads_by_remote={"origin": heads, "mirror": {"main-2": "0" * 40}},
+        )
+        self.assertEqual(
+            branch_hashes,
+            {"main": {"remote1": self.remote_hash("main"), "remote2": None}},
+        )
+
+
+@unittest.skipIf(pygit2 is None, "pygit2 is not installed")
+class TestLocalBranchesPygit2(RemoteRepositoryTestCase):
+    """Test that the pygit2 and for-each-ref listings of get_local_branches agree."""
+
+    def setUp(self):
+        super().setUp()
+        get_local_branches.cache_clear()
+        self.addCleanup(get_local_branches.cache_clear)
+
+    def list_both(self, remote_name, limit=None):
+        """Return the pygit2 and the for-each-ref listing."""
+        from_pygit2 = get_local_branches.__wrapped__(
+            self.workspace_dir, remote_name, limit
+        )
+        with mock.patch.object(
+            check_remote_change, "open_pygit2_repository", return_value=None
+        ):
+            from_git = get_local_branches.__wrapped__(
+                self.workspace_dir, remote_name, limit
+            )
+        return from_pygit2, from_git
+
+    def test_same_result(self):
+        """Test packed and loose refs, the symbolic origin/HEAD and filters."""
+        # The clone wrote packed refs, these updates are loose refs
+        self.push_commit("main", "second")
+        self.push_commit("release/1.0", "release")
+        self.git(self.workspace_dir, "fetch", "-q", "origin")
+        self.git(self.workspace_dir, "remote", "add", "empty", self.remote_dir)
+
+        from_pygit2, from_git = self.list_both("origin")
+        self.assertEqual(from_pygit2, from_git)
+        # Same order too, callers print the branches in this order
+        self.assertEqual(list(from_pygit2), ["feature/a", "main", "release/1.0"])
+        self.assertEqual(from_pygit2["main"], self.remote_hash("main"))
+
+        for limit in ({"main"}, {"main", "release/1.0", "missing"}, {"release"}):
+            with self.subTest(limit=limit):
+                from_pygit2, from_git = self.list_both("origin", frozenset(limit))
+                self.assertEqual(from_pygit2, from_git)
+                self.assertEqual(list(from_pygit2), sorted(from_pygit2))
+
+        # A remote that was never fetched has no branches
+        self.assertEqual(self.list_both("empty"), ({}, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
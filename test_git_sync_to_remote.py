@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for git_sync_to_remote module.
+
+Run with: python -m pytest test_git_sync_to_remote.py
+Or: python test_git_sync_to_remote.py
+"""
+
+import os
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import git_sync_to_remote
+from git_sync_to_remote import (
+    GIT_LOG_FORMAT,
+    PUSH_RATE_LIMIT_PATTERN,
+    CommitInfo,
+    Context,
+    filter_valid_commits,
+    get_batch_range,
+    get_commit_cache_file,
+    has_commit_graph,
+    load_commit_cache,
+    merge_small_batches,
+    plan_batches,
+    save_commit_cache,
+    write_commit_graph,
+)
+
+
+class GitRepositoryTestCase(unittest.TestCase):
+    """Base class for tests that build a small repository with empty commits."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.repo_dir = temp_dir.name
+        self.env = {
+            **os.environ,
+            "GIT_AUTHOR_NAME": "test",
+            "GIT_AUTHOR_EMAIL": "test@example.com",
+            "GIT_COMMITTER_NAME": "test",
+            "GIT_COMMITTER_EMAIL": "test@example.com",
+            "GIT_CONFIG_NOSYSTEM": "1",
+            "HOME": self.repo_dir,
+        }
+        self.git("init", "-q", "-b", "main")
+
+    def git(self, *args):
+        result = subprocess.run(
+            ["git", *args],
+            cwd=self.repo_dir,
+            env=self.env,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return result.stdout
+
+    def commit(self, message):
+        self.git("commit", "-q", "--allow-empty", "-m", message)
+
+    def merge(self, message, *branches, unrelated=False):
+        args = ["merge", "-q", "--no-ff", "-m", message]
+        if unrelated:
+            args.append("--allow-unrelated-histories")
+        self.git(*args, *branches)
+
+    def parse_log(self, ref="main"):
+        output = self.git("log", ref, "--topo-order", f"--format={GIT_LOG_FORMAT}")
+        return filter_valid_commits(output.splitlines(), debug_mode=False)
+
+
+class TestFilterValidCommits(GitRepositoryTestCase):
+    """Test cases for the sub-commit flags set by filter_valid_commits."""
+
+    def assertFlags(self, commits, expected):
+        """Check {message: is_sub_line_of_merge_commit} of all commits."""
+        self.assertEqual(
+            {commit.message: commit.is_sub_line_of_merge_commit for commit in commits},
+            expected,
+        )
+        self.assertEqual(len(commits), len(expected))
+
+    def test_linear_history(self):
+        """Test that no commit of a linear history is a sub-commit."""
+        for message in ("m1", "m2", "m3"):
+            self.commit(message)
+        commits = self.parse_log()
+        self.assertEqual([commit.message for commit in commits], ["m1", "m2", "m3"])
+        self.assertFlags(commits, {"m1": False, "m2": False, "m3": False})
+
+    def test_merge(self):
+        """Test that only the commits of the merged branch are sub-commits."""
+        self.commit("m1")
+        self.git("checkout", "-q", "-b", "side")
+        self.commit("s1")
+        self.commit("s2")
+        self.git("checkout", "-q", "main")
+        self.commit("m2")
+        self.merge("merge side", "side")
+        self.commit("m3")
+        commits = self.parse_log()
+        self.assertFlags(
+            commits,
+            {
+                "m1": False,
+                "s1": True,
+                "s2": True,
+                "m2": False,
+                "merge side": False,
+                "m3": False,
+            },
+        )
+        # Chronological order: the root first, the branch tip last
+        self.assertEqual(commits[0].message, "m1")
+        self.assertEqual(commits[-1].message, "m3")
+        position = {commit.message: idx for idx, commit in enumerate(commits)}
+        self.assertLess(position["s2"], position["merge side"])
+
+    def test_nested_merge(self):
+        """Test that a merge inside a merged branch is a sub-commit as well."""
+        self.commit("m1")
+        self.git("checkout", "-q", "-b", "side")
+        self.commit("s1")
+        self.git("checkout", "-q", "-b", "inner")
+        self.commit("i1")
+        self.git("checkout", "-q", "side")
+        self.commit("s2")
+        self.merge("merge inner", "inner")
+        self.git("checkout", "-q", "main")
+        self.commit("m2")
+        self.merge("merge side", "side")
+        self.assertFlags(
+            self.parse_log(),
+            {
+                "m1": False,
+                "s1": True,
+                "i1": True,
+                "s2": True,
+                "merge inner": True,
+                "m2": False,
+                "merge side": False,
+            },
+        )
+
+    def test_octopus_merge(self):
+        """Test that the commits of all branches of an octopus merge are sub-commits."""
+        self.commit("m1")
+        for branch in ("a", "b"):
+            self.git("checkout", "-q", "-b", branch, "main")
+            self.commit(f"{branch}1")
+            self.commit(f"{branch}2")
+        self.git("checkout", "-q", "main")
+        self.commit("m2")
+        self.merge("octopus", "a", "b")
+        self.assertFlags(
+            self.parse_log(),
+            {
+                "m1": False,
+                "a1": True,
+                "a2": True,
+                "b1": True,
+                "b2": True,
+                "m2": False,
+                "octopus": False,
+            },
+        )
+
+    def test_unrelated_root(self):
+        """Test that a merged history with its own root commit is a sub-line."""
+        self.commit("m1")
+        self.git("checkout", "-q", "--orphan", "other")
+        self.commit("o1")
+        self.commit("o2")
+        self.git("checkout", "-q", "main")
+        self.commit("m2")
+        self.merge("merge other", "other", unrelated=True)
+        self.assertFlags(
+            self.parse_log(),
+            {
+                "m1": False,
+                "o1": True,
+                "o2": True,
+                "m2": False,
+                "merge other": False,
+            },
+        )
+
+
+class TestFilterValidCommitsLines(unittest.TestCase):
+    """Test cases for filter_valid_commits on hand written log lines."""
+
+    def test_root_and_invalid_lines(self):
+        """Test that the root commit parses and unparsable lines are skipped."""
+        root, child = "a" * 40, "b" * 40
+        lines = [
+            f"{child}\t{root}\t  second  ",
+            "",
+            "not a log line",
+            f"{root}\t\tfirst",
+        ]
+        self.assertEqual(
+            [
+                (commit.hash, commit.message, commit.is_sub_line_of_merge_commit)
+                for commit in filter_valid_commits(lines, debug_mode=False)
+            ],
+            [(root, "first", False), (child, "second", False)],
+        )
+
+    def test_commit_after_root_is_sub_line(self):
+        """Test that commits listed after the first-parent chain are sub-commits."""
+        tip, root, other_root = "c" * 40, "a" * 40, "b" * 40
+        lines = [
+            f"{tip}\t{root} {other_root}\tmerge",
+            f"{root}\t\troot",
+            f"{other_root}\t\tother root",
+        ]
+        commits = filter_valid_commits(lines, debug_mode=False)
+        self.assertEqual(
+            commits,
+            [
+                CommitInfo(other_root, "other root", True),
+                CommitInfo(root, "root", False),
+                CommitInfo(tip, "merge", False),
+            ],
+        )
+        self.assertEqual(
+            [commit.is_sub_line_of_merge_commit for commit in commits],
+            [True, False, False],
+        )
+
+
+def make_batch_context(flags):
+    """Build a Context whose commits are real ("R") or sub-commits ("S") by flags."""
+    ctx = Context()
+    ctx.commits = [
+        CommitInfo(f"{idx:040x}", f"commit {idx}", flag == "S")
+        for idx, flag in enumerate(flags)
+    ]
+    ctx.total_commits = len(ctx.commits)
+    ctx.dest_head_hash = "f" * 40
+    ctx.verbosity = 0
+    ctx.echo_commands = False
+    return ctx
+
+
+class TestPlanBatches(unittest.TestCase):
+    """Test cases for plan_batches and get_batch_range."""
+
+    # (commit flags, batch size, expected (start, end, target) per batch)
+    CASES = [
+        ("RRRRRRR", 3, [(0, 2, 2), (3, 5, 5), (6, 6, 6)]),
+        ("RRRRRR", 3, [(0, 2, 2), (3, 5, 5)]),
+        ("RRRRRRR", 10, [(0, 6, 6)]),
+        # Sub-commits at the start: the first batch skips forward to a real commit
+        ("SSSRRR", 3, [(0, 2, 3), (3, 5, 5)]),
+        ("SSRRRR", 3, [(0, 2, 2), (3, 5, 5)]),
+        # Sub-commits at the end of a batch: skip back within the batch
+        ("RRRRRSSR", 3, [(0, 2, 2), (3, 5, 4), (6, 7, 7)]),
+        # Skipping back would reach the batch start: skip forward instead
+        ("RRRRSSR", 3, [(0, 2, 2), (3, 5, 6), (6, 6, 6)]),
+        ("RSSR", 3, [(0, 2, 3), (3, 3, 3)]),
+        # A run of sub-commits spanning whole batches
+        ("RRSSSSSSR", 3, [(0, 2, 1), (3, 5, 8), (6, 8, 8)]),
+    ]
+
+    def test_plan_batches(self):
+        """Test batch boundaries and targets for the table of cases."""
+        for flags, batch_size, expected in self.CASES:
+            with self.subTest(flags=flags, batch_size=batch_size):
+                ctx = make_batch_context(flags)
+                with mock.patch.object(git_sync_to_remote, "BATCH_SIZE", batch_size):
+                    batches = plan_batches(ctx)
+                self.assertEqual(batches, expected)
+                for _, _, target_idx in batches:
+                    target = ctx.commits[target_idx]
+                    self.assertFalse(target.is_sub_line_of_merge_commit)
+
+    def test_get_batch_range(self):
+        """Test that the first batch starts at the destination HEAD."""
+        ctx = make_batch_context("RRRRRSSR")
+        self.assertEqual(
+            get_batch_range(ctx, (0, 2, 2)), (ctx.dest_head_hash, ctx.commits[2].hash)
+        )
+        self.assertEqual(
+            get_batch_range(ctx, (3, 5, 4)), (ctx.commits[2].hash, ctx.commits[4].hash)
+        )
+
+
+class TestMergeSmallBatches(unittest.TestCase):
+    """Test cases for merge_small_batches (--max-pack-mb)."""
+
+    BATCHES = [(0, 2, 2), (3, 5, 5), (6, 8, 8), (9, 11, 11)]
+
+    # (max pack bytes, estimated size per batch, expected batches)
+    CASES = [
+        (0, [10, 20, 30, 40], BATCHES),
+        (1000, [10, 20, 30, 40], [(0, 11, 11)]),
+        (35, [10, 20, 30, 40], [(0, 5, 5), (6, 8, 8), (9, 11, 11)]),
+        # The combined estimate must stay strictly below the limit
+        (30, [10, 20, 5, 5], [(0, 2, 2), (3, 8, 8), (9, 11, 11)]),
+        (10, [10, 10, 10, 10], BATCHES),
+        (50, [60, 10, 10, 60], [(0, 2, 2), (3, 8, 8), (9, 11, 11)]),
+    ]
+
+    def run_merge(self, max_pack_bytes, sizes):
+        ctx = make_batch_context("R" * 12)
+        ctx.max_pack_bytes = max_pack_bytes
+        size_by_target = {
+            ctx.commits[target_idx].hash: size
+            for (_, _, target_idx), size in zip(self.BATCHES, sizes)
+        }
+
+        def fake_disk_usage(cmd, **kwargs):
+            # cmd is [..., target, ^start]
+            return f"{size_by_target[cmd[-2]]}\n"
+
+        with mock.patch.object(
+            git_sync_to_remote,
+            "run_command_and_get_return_info",
+            side_effect=fake_disk_usage,
+        ) as run_mock:
+            return merge_small_batches(ctx, list(self.BATCHES)), run_mock
+
+    def test_merge_small_batches(self):
+        """Test greedy merging for the table of cases."""
+        for max_pack_bytes, sizes, expected in self.CASES:
+            with self.subTest(max_pack_bytes=max_pack_bytes, sizes=sizes):
+                merged, run_mock = self.run_merge(max_pack_bytes, sizes)
+                self.assertEqual(merged, expected)
+                self.assertEqual(run_mock.call_count, 4 if max_pack_bytes else 0)
+
+    def test_commit_cap(self):
+        """Test the BATCH_SIZE * MAX_MERGED_BATCHES commit cap of a merged push."""
+        with mock.patch.object(git_sync_to_remote, "BATCH_SIZE", 3):
+            for max_merged, expected in (
+                (1, self.BATCHES),
+                (2, [(0, 5, 5), (6, 11, 11)]),
+                (3, [(0, 8, 8), (9, 11, 11)]),
+                (4, [(0, 11, 11)]),
+            ):
+                with self.subTest(max_merged=max_merged), mock.patch.object(
+                    git_sync_to_remote, "MAX_MERGED_BATCHES", max_merged
+                ):
+                    merged, _ = self.run_merge(1000, [1, 1, 1, 1])
+                    self.assertEqual(merged, expected)
+
+    def test_estimate_failure(self):
+        """Test that batches are kept as they are when the estimate fails."""
+        ctx = make_batch_context("R" * 12)
+        ctx.max_pack_bytes = 1000
+        error = subprocess.CalledProcessError(129, ["git", "rev-list"])
+        with mock.patch.object(
+            git_sync_to_remote, "run_command_and_get_return_info", side_effect=error
+        ), mock.patch("builtins.print"):
+            merged = merge_small_batches(ctx, list(self.BATCHES))
+        self.assertEqual(merged, self.BATCHES)
+
+
+class TestPushRateLimitPattern(unittest.TestCase):
+    """Test cases for PUSH_RATE_LIMIT_PATTERN."""
+
+    RATE_LIMITED = [
+        "error: RPC failed; HTTP 429 curl 22 The requested URL returned error: 429",
+        "fatal: unable to access 'https://example.com/repo.git/': "
+        "The requested URL returned error: 429",
+        "< HTTP/2 429",
+        "< HTTP/1.1 429 Too Many Requests",
+        "remote: Rate limit exceeded, please retry later",
+        "remote: API rate-limit reached for this repository",
+        "remote: You are pushing too often, please slow down",
+        "remote: Too Many Requests",
+    ]
+
+    NOT_RATE_LIMITED = [
+        "Writing objects: 100% (429/429), 4.29 KiB | 4.29 MiB/s, done.",
+        "Counting objects: 429, done.",
+        "Total 429 (delta 12), reused 0 (delta 0), pack-reused 0",
+        "remote: Resolving deltas: 100% (429/429), done.",
+        "   1a2b429..9f8e7d6  9f8e7d6 -> develop",
+        "remote: error: object 429c1e5a: missing blob",
+        "fatal: unable to access 'https://example.com/repo.git/': "
+        "The requested URL returned error: 403",
+        "error: RPC failed; HTTP 500 curl 22 The requested URL returned error: 500",
+        " ! [remote rejected] 4290abc -> develop (pre-receive hook declined)",
+        "error: failed to push some refs to 'https://example.com/repo.git'",
+    ]
+
+    def test_rate_limited_output(self):
+        """Test that rate limiting responses are recognized."""
+        for line in self.RATE_LIMITED:
+            with self.subTest(line=line):
+                self.assertIsNotNone(PUSH_RATE_LIMIT_PATTERN.search(line))
+
+    def test_other_output(self):
+        """Test that other push output containing 429 is not a rate limit."""
+        for line in self.NOT_RATE_LIMITED:
+            with self.subTest(line=line):
+                self.assertIsNone(PUSH_RATE_LIMIT_PATTERN.search(line))
+
+
+class TestCommitCache(unittest.TestCase):
+    """Test cases for the origin log cache files."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+
+    def save(self, branch, head_hash):
+        """Save a two commit log of branch ending at head_hash, return its file."""
+        ctx = Context()
+        ctx.temp_dir = self.temp_dir
+        ctx.branch = branch
+        commits = [
+            CommitInfo("a" * 40, f"{branch} first", False),
+            CommitInfo(head_hash, "", False),
+        ]
+        cache_file = get_commit_cache_file(ctx, "origin", head_hash)
+        save_commit_cache(cache_file, commits)
+        return cache_file, commits
+
+    def test_round_trip(self):
+        """Test that saved commits are loaded back, including empty messages."""
+        head = "b" * 40
+        cache_file, commits = self.save("main", head)
+        loaded = load_commit_cache(cache_file, head)
+        self.assertEqual(
+            [(c.hash, c.message, c.is_sub_line_of_merge_commit) for c in loaded],
+            [(c.hash, c.message, c.is_sub_line_of_merge_commit) for c in commits],
+        )
+        # A cache that doesn't end at the expected tip is not used
+        self.assertIsNone(load_commit_cache(cache_file, "c" * 40))
+
+    def assert_branches_kept_apart(self, branch, other_branch):
+        """Check that caching branch never touches the cache of other_branch."""
+        old_file, _ = self.save(branch, "1" * 40)
+        other_file, _ = self.save(other_branch, "2" * 40)
+        self.assertNotEqual(old_file, other_file)
+        self.assertTrue(old_file.exists())
+
+        # A new tip of branch replaces only its own older cache
+        new_file, _ = self.save(branch, "3" * 40)
+        self.assertTrue(new_file.exists())
+        self.assertFalse(old_file.exists())
+        self.assertTrue(other_file.exists())
+        other_commits = load_commit_cache(other_file, "2" * 40)
+        self.assertEqual(other_commits[0].message, f"{other_branch} first")
+
+    def test_branch_name_is_prefix_of_other(self):
+        """Test that the caches of branches "a" and "a_b" are separate."""
+        self.assert_branches_kept_apart("a", "a_b")
+        self.assert_branches_kept_apart("a_b", "a")
+
+    def test_slash_and_underscore(self):
+        """Test that the caches of branches "a/b" and "a_b" are separate."""
+        self.assert_branches_kept_apart("a/b", "a_b")
+        self.assert_branches_kept_apart("a_b", "a/b")
+
+    def test_unrelated_files_are_kept(self):
+        """Test that files not named like a commit cache are never removed."""
+        other_file = self.temp_dir / "origin_main.txt"
+        other_file.write_text("log")
+        self.save("main", "1" * 40)
+        self.save("main", "2" * 40)
+        self.assertTrue(other_file.exists())
+        self.assertEqual(len(list(self.temp_dir.glob("*.cache"))), 1)
+
+
+class TestCommitGraph(GitRepositoryTestCase):
+    """Test cases for has_commit_graph and write_commit_graph."""
+
+    def setUp(self):
+        super().setUp()
+        self.commit("first")
+        self.commit("second")
+        self.ctx = Context()
+        self.ctx.workspace_dir = self.repo_dir
+        self.ctx.echo_commands = False
+        self.ctx.cmd_logger = mock.Mock()
+
+    def test_write_and_detect(self):
+        """Test that a written commit-graph chain is detected."""
+        self.assertFalse(has_commit_graph(self.ctx))
+        write_commit_graph(self.ctx, changed_paths=True)
+        self.assertTrue(has_commit_graph(self.ctx))
+        # Updating an existing chain keeps it valid
+        self.commit("third")
+        write_commit_graph(self.ctx)
+        self.git("commit-graph", "verify")
+
+    def test_single_file_graph_detected(self):
+        """Test that a commit-graph written without --split is detected too."""
+        self.git("commit-graph", "write", "--reachable")
+        self.assertTrue(has_commit_graph(self.ctx))
+
+    def test_no_timeout(self):
+        """Test that the write is not killed by the default command timeout."""
+        with mock.patch.object(git_sync_to_remote, "run_command", return_value=0) as run:
+            write_commit_graph(self.ctx)
+        self.assertIsNone(run.call_args.kwargs["timeout"])
+        self.assertFalse(run.call_args.kwargs["echo"])
+        self.assertNotIn("--changed-paths", run.call_args.args[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,8 +7,14 @@ Run with: python -m pytest test_git_sync_util.py
 Or: python test_git_sync_util.py
 """
 
+import os
+import subprocess
+import tempfile
 import unittest
-from git_sync_util import sanitize_remote_url
+from unittest import mock
+
+import git_sync_util
+from git_sync_util import RefResolver, open_pygit2_repository, sanitize_remote_url
 
 
 class TestSanitizeRemoteUrl(unittest.TestCase):
@@ -182,5 +188,99 @@ class TestSanitizeRemoteUrl(unittest.TestCase):
         self.assertEqual(sanitize_remote_url(url), expected)
 
 
+class TestOpenPygit2Repository(unittest.TestCase):
+    """Test cases for open_pygit2_repository function."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+
+    def init_repository(self):
+        subprocess.run(
+            ["git", "init", "-q", self.temp_dir], check=True, capture_output=True
+        )
+
+    def test_without_pygit2(self):
+        """Test that None is returned when pygit2 is not installed."""
+        self.init_repository()
+        with mock.patch.object(git_sync_util, "pygit2", None):
+            self.assertIsNone(open_pygit2_repository(self.temp_dir))
+
+    @unittest.skipIf(git_sync_util.pygit2 is None, "pygit2 is not installed")
+    def test_repository(self):
+        """Test that a git repository is opened."""
+        self.init_repository()
+        repo = open_pygit2_repository(self.temp_dir)
+        self.assertIsInstance(repo, git_sync_util.pygit2.Repository)
+
+    @unittest.skipIf(git_sync_util.pygit2 is None, "pygit2 is not installed")
+    def test_not_a_repository(self):
+        """Test that None is returned for a directory that is not a repository."""
+        self.assertIsNone(open_pygit2_repository(self.temp_dir))
+
+
+class TestRefResolver(unittest.TestCase):
+    """Test cases for RefResolver class."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.repo_dir = temp_dir.name
+        self.env = {
+            **os.environ,
+            "GIT_AUTHOR_NAME": "test",
+            "GIT_AUTHOR_EMAIL": "test@example.com",
+            "GIT_COMMITTER_NAME": "test",
+            "GIT_COMMITTER_EMAIL": "test@example.com",
+            "GIT_CONFIG_NOSYSTEM": "1",
+            "HOME": self.repo_dir,
+        }
+        self.git("init", "-q")
+
+    def git(self, *args):
+        result = subprocess.run(
+            ["git", *args],
+            cwd=self.repo_dir,
+            env=self.env,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return result.stdout.strip()
+
+    def commit_to(self, ref):
+        """Make an empty commit, point ref at it and return its hash."""
+        self.git("commit", "-q", "--allow-empty", "-m", ref)
+        self.git("update-ref", ref, "HEAD")
+        return self.git("rev-parse", "HEAD")
+
+    def test_resolve(self):
+        """Test resolving existing and missing refs."""
+        commit_hash = self.commit_to("refs/remotes/dest/main")
+        with RefResolver(self.repo_dir) as resolver:
+            self.assertEqual(resolver.resolve("refs/remotes/dest/main"), commit_hash)
+            self.assertIsNone(resolver.resolve("refs/remotes/dest/missing"))
+            self.assertIsNone(resolver.process.poll())
+        self.assertIsNotNone(resolver.process.poll())
+
+    def test_sees_updates(self):
+        """Test that refs updated after the process started are seen.
+
+        git_sync_to_remote keeps one resolver for all batches and reads the
+        destination head after every fetch.
+        """
+        self.commit_to("refs/remotes/dest/main")
+        self.git("pack-refs", "--all")
+        with RefResolver(self.repo_dir) as resolver:
+            resolver.resolve("refs/remotes/dest/main")
+            # A loose ref, then a packed one
+            loose_hash = self.commit_to("refs/remotes/dest/main")
+            self.assertEqual(resolver.resolve("refs/remotes/dest/main"), loose_hash)
+            packed_hash = self.commit_to("refs/remotes/dest/main")
+            self.git("pack-refs", "--all")
+            self.assertEqual(resolver.resolve("refs/remotes/dest/main"), packed_hash)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for init_git_sync_folder module.
+
+Run with: python -m pytest test_init_git_sync_folder.py
+Or: python test_init_git_sync_folder.py
+"""
+
+import io
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from init_git_sync_folder import configure_remote, get_command_output
+
+
+class TestInitGitSyncFolder(unittest.TestCase):
+    """Test cases for the remote setup helpers."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.repo_dir = temp_dir.name
+        subprocess.run(["git", "init", "-q", "--bare", self.repo_dir], check=True)
+        # The helpers print every command they run
+        patcher = mock.patch("sys.stdout", new_callable=io.StringIO)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_command_output(self):
+        """Test the return code and output of commands that succeed or fail."""
+        result, output = get_command_output(
+            ["git", "rev-parse", "--is-bare-repository"], self.repo_dir
+        )
+        self.assertEqual((result, output.strip()), (0, "true"))
+
+        result, _ = get_command_output(
+            ["git", "remote", "get-url", "origin"], self.repo_dir
+        )
+        self.assertNotEqual(result, 0)
+
+        # A command that cannot be started is reported, not raised
+        result, output = get_command_output(
+            ["git-sync-no-such-command"], self.repo_dir
+        )
+        self.assertEqual((result, output), (-1, ""))
+
+    def test_configure_remote(self):
+        """Test adding a remote, keeping a matching URL and updating another."""
+        url = "https://example.com/repo.git"
+        self.assertTrue(configure_remote(self.repo_dir, "origin", url))
+        self.assertTrue(configure_remote(self.repo_dir, "origin", url))
+        result, output = get_command_output(
+            ["git", "remote", "get-url", "origin"], self.repo_dir
+        )
+        self.assertEqual((result, output.strip()), (0, url))
+
+        other_url = "https://example.com/other.git"
+        self.assertTrue(configure_remote(self.repo_dir, "origin", other_url))
+        _, output = get_command_output(
+            ["git", "remote", "get-url", "origin"], self.repo_dir
+        )
+        self.assertEqual(output.strip(), other_url)
+
+
+if __name__ == "__main__":
+    unittest.main()
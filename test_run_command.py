@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for run_command module.
+
+Run with: python -m pytest test_run_command.py
+Or: python test_run_command.py
+"""
+
+import contextlib
+import io
+import os
+import re
+import subprocess
+import sys
+import time
+import unittest
+from run_command import ErrorPatternLogger, run_command, run_command_and_iter_lines
+
+
+def python_command(code):
+    """Build a command running a Python snippet with the current interpreter."""
+    return [sys.executable, "-c", code]
+
+
+class TestRunCommandAndIterLines(unittest.TestCase):
+    """Test cases for run_command_and_iter_lines function."""
+
+    def test_normal_completion(self):
+        """Test that all lines are yielded without their newlines."""
+        cmd = python_command("print('first'); print(''); print('last')")
+        lines = list(run_command_and_iter_lines(cmd, echo=False))
+        self.assertEqual(lines, ["first", "", "last"])
+
+    def test_non_zero_return_code(self):
+        """Test that a failing command raises after its output was yielded."""
+        cmd = python_command("import sys; print('partial'); sys.exit(3)")
+        lines = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(subprocess.CalledProcessError) as cm:
+                for line in run_command_and_iter_lines(cmd, echo=False):
+                    lines.append(line)
+        self.assertEqual(lines, ["partial"])
+        self.assertEqual(cm.exception.returncode, 3)
+
+    def test_timeout_kill(self):
+        """Test that a command running past the timeout is killed."""
+        cmd = python_command(
+            "import sys, time; print('started', flush=True); time.sleep(60)"
+        )
+        lines = []
+        start = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(subprocess.TimeoutExpired):
+                for line in run_command_and_iter_lines(cmd, timeout=1, echo=False):
+                    lines.append(line)
+        self.assertEqual(lines, ["started"])
+        self.assertLess(time.monotonic() - start, 30)
+
+    @unittest.skipIf(os.name == "nt", "uses os.kill to probe the child process")
+    def test_consumer_stops_early(self):
+        """Test that the process is killed when the consumer stops iterating."""
+        cmd = python_command(
+            "import os, time; print(os.getpid(), flush=True); print('more', flush=True);"
+            " time.sleep(60)"
+        )
+        lines = run_command_and_iter_lines(cmd, echo=False)
+        pid = int(next(lines))
+        start = time.monotonic()
+        lines.close()
+        self.assertLess(time.monotonic() - start, 30)
+        # The child was killed and reaped, its pid no longer exists
+        with self.assertRaises(ProcessLookupError):
+            os.kill(pid, 0)
+
+
+class RecordingLogger:
+    """Logger that records what it was given."""
+
+    def __init__(self):
+        self.messages = []
+
+    def info(self, message):
+        self.messages.append(("info", message))
+
+    def error(self, message):
+        self.messages.append(("error", message))
+
+
+class TestErrorPatternLogger(unittest.TestCase):
+    """Test cases for ErrorPatternLogger class."""
+
+    def test_forwards_messages(self):
+        """Test that messages are forwarded to the original logger unchanged."""
+        original = RecordingLogger()
+        logger = ErrorPatternLogger(original, re.compile("error", re.IGNORECASE))
+        logger.info("Counting objects: 3")
+        logger.error("remote: rejected")
+        self.assertEqual(
+            original.messages,
+            [("info", "Counting objects: 3"), ("error", "remote: rejected")],
+        )
+
+    def test_error_seen(self):
+        """Test that error_seen is set by info or error lines matching the pattern."""
+        logger = ErrorPatternLogger(None, re.compile("ERROR", re.IGNORECASE))
+        logger.info("Writing objects: 100% (3/3), done.")
+        self.assertFalse(logger.error_seen)
+        logger.info("error: failed to push some refs")
+        self.assertTrue(logger.error_seen)
+        # Stays set once an error was seen
+        logger.info("To ../dst.git")
+        self.assertTrue(logger.error_seen)
+
+        logger = ErrorPatternLogger(None, re.compile("ERROR", re.IGNORECASE))
+        logger.error("fatal: ERROR from hook")
+        self.assertTrue(logger.error_seen)
+
+    def test_keeps_last_lines(self):
+        """Test that get_output returns only the most recent max_lines lines."""
+        logger = ErrorPatternLogger(None, re.compile("error"), max_lines=3)
+        for idx in range(10):
+            logger.info(f"line {idx}")
+        self.assertEqual(logger.get_output(), "line 7\nline 8\nline 9")
+
+        logger = ErrorPatternLogger(None, re.compile("error"))
+        for idx in range(60):
+            logger.info(f"line {idx}")
+        lines = logger.get_output().split("\n")
+        self.assertEqual(len(lines), 50)
+        self.assertEqual(lines[0], "line 10")
+
+    def test_with_run_command(self):
+        """Test the logger with the output of a command run through run_command."""
+        logger = ErrorPatternLogger(None, re.compile("ERROR", re.IGNORECASE))
+        cmd = python_command(
+            "import sys; print('ok line'); print('error: denied', file=sys.stderr)"
+        )
+        return_code = run_command(cmd, logger=logger, stderr_to_stdout=True, echo=False)
+        self.assertEqual(return_code, 0)
+        self.assertTrue(logger.error_seen)
+        self.assertIn("ok line", logger.get_output())
+        self.assertIn("error: denied", logger.get_output())
+
+
+if __name__ == "__main__":
+    unittest.main()